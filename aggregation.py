@@ -0,0 +1,282 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from data_loader import (CHARGES_LABELS, CHUNK_SIZE, DATA_PATH, SAMPLE_SIZE, SERVICE_COLUMNS, TENURE_LABELS,
+                         compact_churn_data, group_columns, iter_source_chunks)
+from profiling import span
+from quantile_sketch import QuantileSketches
+from running_stats import RunningStats
+
+# Cuboids kept per grouping of the rows: every chunk is grouped once by the
+# columns of a key, and each cuboid listed under it is rolled up from that.
+# The cells of a cuboid are bounded by the product of its columns' levels,
+# so its size and the cost of every table stay the same at 7k or 70M
+# customers. The services are kept in pairs, which is what the service
+# pages chart; a cross product of every column would key nearly every row.
+CUBOIDS = {
+    ('Contract', 'PaymentMethod', 'PaperlessBilling', 'tenure_group', 'charges_group'):
+        [('Contract', 'PaymentMethod', 'PaperlessBilling', 'tenure_group', 'charges_group')],
+    ('gender', 'SeniorCitizen', 'Partner', 'Dependents'): [('gender', 'SeniorCitizen', 'Partner', 'Dependents')],
+    tuple(SERVICE_COLUMNS): list(combinations(SERVICE_COLUMNS, 2)),
+}
+NUMERIC_COLUMNS = ['tenure', 'MonthlyCharges', 'TotalCharges']
+# Binned columns keep their natural order instead of alphabetical order
+BIN_LABELS = {'tenure_group': TENURE_LABELS, 'charges_group': CHARGES_LABELS}
+# Buffered chunk counts are rolled into the cuboids once they hold this
+# many cells, so the buffer stays bounded however many chunks a file has
+PENDING_CELLS = 200_000
+
+
+# 0/1 churn indicator for every row, from churn_flag when the frame has one
+def churn_flags(df):
+    if 'churn_flag' in df.columns:
+        return df['churn_flag'].to_numpy()
+    return (df['Churn'] == 'Yes').to_numpy().astype('int8')
+
+
+# Integer codes and number of levels for one key column. Categorical
+# columns reuse their stored codes; missing values get code -1, or a level
+# of their own when they are kept.
+def _factorize(values, dropna):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy().astype('int64')
+        n_levels = len(values.cat.categories)
+        if not dropna:
+            codes[codes < 0] = n_levels
+            n_levels += 1
+        return codes, n_levels
+    codes, levels = pd.factorize(values, sort=True, use_na_sentinel=dropna)
+    return codes, len(levels)
+
+
+# Sum each of values per combination of keys in one vectorized pass.
+# Every key is factorized to integer codes, the codes are combined into a
+# single mixed-radix group id and the sums come from np.bincount, so no
+# Python code runs per group. A value of None counts rows instead.
+# Only observed groups are returned, sorted like DataFrame.groupby.
+def sum_by_group(df, keys, values, dropna=True):
+    group_id = np.zeros(len(df), dtype='int64')
+    valid = np.ones(len(df), dtype=bool)
+    n_groups = 1
+    for key in keys:
+        codes, n_levels = _factorize(df[key], dropna)
+        valid &= codes >= 0
+        if n_groups * max(n_levels, 1) >= 2 ** 62:
+            # Replace the id by its rank so it stays within int64, this keeps the order
+            group_id = np.unique(group_id, return_inverse=True)[1].reshape(-1)
+            n_groups = int(group_id.max()) + 1 if len(group_id) else 1
+        group_id = group_id * n_levels + codes
+        n_groups *= n_levels
+
+    rows = np.flatnonzero(valid)
+    group_id = group_id[rows]
+    if n_groups > 4 * len(group_id) + 1024:
+        # Too many possible combinations for a dense bincount, compress first
+        group_id = np.unique(group_id, return_inverse=True)[1].reshape(-1)
+        n_groups = int(group_id.max()) + 1 if len(group_id) else 0
+
+    counts = np.bincount(group_id, minlength=n_groups)
+    cells = np.flatnonzero(counts)
+    # The first row of every group supplies its key values
+    first = np.empty(n_groups, dtype='int64')
+    first[group_id[::-1]] = np.arange(len(group_id) - 1, -1, -1)
+    sample_rows = rows[first[cells]]
+    result = pd.DataFrame({key: df[key].iloc[sample_rows].reset_index(drop=True) for key in keys},
+                          index=pd.RangeIndex(len(cells)))
+    for name, weights in values.items():
+        if weights is None:
+            result[name] = counts[cells]
+            continue
+        weights = np.asarray(weights)
+        total = np.bincount(group_id, weights=weights[rows], minlength=n_groups)[cells]
+        result[name] = total.astype('int64') if weights.dtype.kind in 'biu' else total
+    return result
+
+
+# Customers and Churned for every observed combination of keys
+def churn_table(df, keys, dropna=True):
+    return sum_by_group(df, list(keys), {'Customers': None, 'Churned': churn_flags(df)}, dropna)
+
+
+# Same shape as df.groupby(keys)['Churn'].apply(lambda x: (x == 'Yes').mean() * 100).reset_index()
+def churn_rates(df, keys):
+    result = churn_table(df, keys)
+    result['Churn Rate (%)'] = result['Churned'] / result['Customers'] * 100
+    return result[list(keys) + ['Churn Rate (%)']]
+
+
+# Re-aggregate a Customers/Churned table onto a subset of its keys
+def _roll_up(counts, keys, dropna=True):
+    return sum_by_group(counts, list(keys), {'Customers': counts['Customers'],
+                                             'Churned': counts['Churned']}, dropna)
+
+
+# Customer and churned counts for every observed combination of the
+# columns of each cuboid in CUBOIDS, plus the sums behind the KPIs. Built
+# chunk by chunk with update(), so it never needs every row at once; partial
+# aggregates from different chunks combine with merge(). subtract() removes
+# rows again, which lets deltas replace customers. The counts of each chunk
+# are buffered per grouping and rolled into the cuboids by flush(), once
+# for many chunks (see PENDING_CELLS); tables flush first.
+class ChurnAggregates:
+    def __init__(self, cuboids=CUBOIDS):
+        self.groupings = {tuple(grouping): [tuple(dims) for dims in kept] for grouping, kept in cuboids.items()}
+        self.rows = 0
+        self.churned = 0
+        # Means, variances and correlations of the numeric columns and churn
+        self.stats = RunningStats(NUMERIC_COLUMNS + ['churn_flag'])
+        # Quantiles of the numeric columns per contract, payment method and churn
+        self.sketches = QuantileSketches(NUMERIC_COLUMNS)
+        self.sample = None
+        # Columns of a cuboid -> its Customers and Churned per combination
+        self.cuboids = {}
+        # Grouping -> counts of the chunks not yet rolled into its cuboids
+        self._pending = {}
+        self._pending_cells = 0
+
+    def update(self, chunk, sign=1):
+        churn = churn_flags(chunk)
+        self.rows += sign * len(chunk)
+        self.churned += sign * int(churn.sum())
+        if sign < 0:
+            self.stats.subtract(chunk)
+        else:
+            self.stats.update(chunk)
+        self.sketches.update(chunk, sign)
+
+        columns = group_columns(chunk)
+        for grouping in self.groupings:
+            frame = pd.DataFrame({k: columns[k] if k in columns else chunk[k] for k in grouping})
+            frame['churn_flag'] = churn
+            part = churn_table(frame, grouping, dropna=False)
+            if sign < 0:
+                part[['Customers', 'Churned']] *= -1
+            self._pending.setdefault(grouping, []).append(part)
+            self._pending_cells += len(part)
+        if self._pending_cells >= PENDING_CELLS:
+            self.flush()
+        return self
+
+    def subtract(self, chunk):
+        return self.update(chunk, sign=-1)
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.churned += other.churned
+        self.stats.merge(other.stats)
+        self.sketches.merge(other.sketches)
+        self.flush()
+        for dims, cells in other.flush().cuboids.items():
+            self._add_cells(dims, cells)
+        return self
+
+    # Roll the buffered chunk counts into the cuboids
+    def flush(self):
+        pending, self._pending, self._pending_cells = self._pending, {}, 0
+        for grouping, parts in pending.items():
+            part = _roll_up(pd.concat(parts, ignore_index=True), grouping, dropna=False)
+            for dims in self.groupings[grouping]:
+                self._add_cells(dims, part if dims == grouping else _roll_up(part, dims, dropna=False))
+        return self
+
+    # Add the counts of part into one cuboid. The cuboid is small, so it is
+    # simply rolled up together with part; cells whose customers were all
+    # removed again are dropped.
+    def _add_cells(self, dims, part):
+        cells = self.cuboids.get(dims)
+        if cells is not None:
+            part = _roll_up(pd.concat([cells, part], ignore_index=True), dims, dropna=False)
+        self.cuboids[dims] = part[(part['Customers'] != 0) | (part['Churned'] != 0)].reset_index(drop=True)
+
+    # Smallest cuboid holding every one of columns
+    def cuboid(self, columns):
+        columns = set(columns)
+        candidates = [cells for dims, cells in self.flush().cuboids.items() if columns <= set(dims)]
+        if not candidates:
+            raise KeyError(f"no cuboid holds {sorted(columns)}")
+        return min(candidates, key=len)
+
+    def mean(self, column):
+        return self.stats.mean(column)
+
+    def churn_rate(self):
+        return self.churned / self.rows * 100 if self.rows else float('nan')
+
+    # Churn value counts, largest first like Series.value_counts()
+    def churn_counts(self):
+        counts = pd.Series({'No': self.rows - self.churned, 'Yes': self.churned}, name='count')
+        return counts.sort_values(ascending=False)
+
+    # Observed values of one dimension, in display order
+    def levels(self, column):
+        return self.table([column])[column].tolist()
+
+    # Customers and Churned per combination of keys. filters maps a
+    # dimension to the values to keep, like the page multiselects.
+    def table(self, keys, filters=None):
+        keys = list(keys)
+        with span("aggregate " + "+".join(keys)):
+            return self._table(keys, filters)
+
+    def _table(self, keys, filters):
+        cube = self.cuboid(keys + list(filters or {}))
+        if filters:
+            mask = np.ones(len(cube), dtype=bool)
+            for col, allowed in filters.items():
+                mask &= cube[col].isin(allowed).to_numpy()
+            cube = cube[mask]
+        result = _roll_up(cube, keys)
+        # Combinations whose customers were all replaced by deltas
+        result = result[result['Customers'] > 0]
+        for col in keys:
+            if col in BIN_LABELS:
+                result[col] = pd.Categorical(result[col], categories=BIN_LABELS[col], ordered=True)
+        return result.sort_values(keys, ignore_index=True)
+
+    # Customers per combination of keys split by churn status, in long
+    # format with Churn and Count columns
+    def churn_split(self, keys, filters=None):
+        keys = list(keys)
+        counts = self.table(keys, filters)
+        stayed = counts[keys].assign(Churn='No', Count=counts['Customers'] - counts['Churned'])
+        churned = counts[keys].assign(Churn='Yes', Count=counts['Churned'])
+        return pd.concat([stayed, churned], ignore_index=True)
+
+    # Same shape as df.groupby(keys)['Churn'].apply(lambda x: (x == 'Yes').mean() * 100).reset_index()
+    def churn_rates(self, keys, filters=None):
+        result = self.table(keys, filters)
+        result['Churn Rate (%)'] = result['Churned'] / result['Customers'] * 100
+        return result[list(keys) + ['Churn Rate (%)']]
+
+
+# Aggregate a frame that is already in memory
+def aggregate_frame(df):
+    return ChurnAggregates().update(df).flush()
+
+
+# Aggregate the source file chunk by chunk. Peak memory is bounded by
+# chunk_size plus a uniform random sample of sample_size rows, which the
+# pages use for charts of individual customers.
+def stream_aggregates(path=DATA_PATH, chunk_size=CHUNK_SIZE, sample_size=SAMPLE_SIZE, seed=42):
+    rng = np.random.default_rng(seed)
+    aggregates = ChurnAggregates()
+    sample, sample_keys = None, np.empty(0)
+    for chunk in iter_source_chunks(path, chunk_size):
+        aggregates.update(chunk)
+        # Keep the rows with the smallest random keys seen so far
+        keys = rng.random(len(chunk))
+        if sample is not None:
+            chunk = pd.concat([sample, chunk], ignore_index=True)
+            keys = np.concatenate([sample_keys, keys])
+        if len(chunk) > sample_size:
+            keep = np.argpartition(keys, sample_size)[:sample_size]
+            chunk, keys = chunk.iloc[keep], keys[keep]
+        sample, sample_keys = chunk.reset_index(drop=True), keys
+    if sample is None:
+        raise ValueError(f"{path} holds no customers")
+    # Chunks carry their own categories, re-encode the combined sample once
+    categories = {col: object for col in sample.select_dtypes('category').columns}
+    aggregates.sample = compact_churn_data(sample.astype(categories))
+    return aggregates.flush()
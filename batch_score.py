@@ -0,0 +1,109 @@
+import argparse
+import io
+import os
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from data_loader import CHUNK_SIZE, DATA_PATH, ChunkWriter, clean_churn_data, peak_memory
+from churn_model import ChurnModel
+from scoring import score_customers
+
+
+# Raw pieces of the source file of about chunk_size rows each. CSV pieces
+# are parsed by the process that scores them, so with several workers the
+# parsing is spread over all cores as well; they are cut at line ends, which
+# assumes no quoted field spans several lines. Parquet pieces are record
+# batches of at most chunk_size rows, so a file written as one large row
+# group is never read whole.
+def iter_source_pieces(path, chunk_size=CHUNK_SIZE):
+    if path.lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield ('arrow', batch, None)
+    else:
+        with open(path, 'rb') as f:
+            header = f.readline()
+            while True:
+                lines = list(islice(f, chunk_size))
+                if not lines:
+                    break
+                yield ('csv', header + b''.join(lines), None)
+
+
+# Fitted model of this process, None for the rule-based model
+_model = None
+
+
+def _load_model(path):
+    global _model
+    _model = ChurnModel.load(path) if path else None
+
+
+# Parse, clean and score one piece, runs in the worker processes
+def score_piece(piece):
+    kind, source, _ = piece
+    if kind == 'arrow':
+        raw = source.to_pandas()
+    else:
+        raw = pd.read_csv(io.BytesIO(source))
+    return score_customers(clean_churn_data(raw), _model).reset_index(drop=True)
+
+
+# Scored chunks in input order. With several workers at most 2 pieces per
+# worker are in flight, so memory stays bounded by the chunk size. Scores
+# come from the model artifact at model_path, or from the rule-based model.
+def iter_scored_chunks(path, chunk_size=CHUNK_SIZE, workers=1, model_path=None):
+    pieces = iter_source_pieces(path, chunk_size)
+    if workers <= 1:
+        _load_model(model_path)
+        for piece in pieces:
+            yield score_piece(piece)
+        return
+    with get_context('spawn').Pool(workers, initializer=_load_model, initargs=(model_path,)) as pool:
+        pending = deque()
+        for piece in pieces:
+            pending.append(pool.apply_async(score_piece, (piece,)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every customer of a churn extract without loading it whole.")
+    parser.add_argument("input", nargs="?", default=DATA_PATH, help="CSV or Parquet file to score")
+    parser.add_argument("output", help="CSV or Parquet file to write the scores to")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--model", help="fitted model artifact (JSON) to score with instead of the rule-based model")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.input):
+        parser.error(f"input file not found: {args.input}")
+
+    start = time.perf_counter()
+    writer = ChunkWriter(args.output)
+    rows = 0
+    try:
+        for scores in iter_scored_chunks(args.input, args.chunk_size, args.workers, args.model):
+            if 'customerID' not in scores.columns:
+                scores.insert(0, 'row', np.arange(rows, rows + len(scores)))
+            writer.write(scores)
+            rows += len(scores)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    own, workers = peak_memory()
+    print(f"Scored {rows:,} customers in {elapsed:.1f} s ({rows / max(elapsed, 1e-9):,.0f} rows/s) "
+          f"with {args.workers} worker(s)")
+    print(f"Peak memory: {own:.0f} MB main process, {workers:.0f} MB largest worker")
+
+
+if __name__ == "__main__":
+    main()
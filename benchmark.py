@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+BENCH_DIR = os.environ.get("CHURN_BENCH_DIR", ".churn_bench")
+DEFAULT_ROWS = [10_000, 1_000_000, 10_000_000]
+# A run is flagged when a metric exceeds the baseline by this fraction...
+DEFAULT_TOLERANCE = 0.25
+# ...and, for timings, by at least this many seconds, to ignore jitter
+MIN_TIME_REGRESSION = 0.05
+
+
+def _widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def _first_option(kind, label):
+    def apply(at):
+        widget = _widget(getattr(at, kind), label)
+        widget.set_value([widget.options[0]] if kind == 'multiselect' else widget.options[1])
+    return apply
+
+
+def _rule_based(at):
+    _widget(at.main.radio, "Scoring model").set_value("Rule-based")
+
+
+# Page and widget state of every benchmark scenario. Each page runs with its
+# default widgets, filtered pages also with a narrowed selection.
+SCENARIOS = [
+    ("Executive Summary", "default", None),
+    ("Customer Demographics", "default", None),
+    ("Customer Demographics", "one gender", _first_option('multiselect', "Filter by Gender")),
+    ("Service Analysis", "default", None),
+    ("Service Analysis", "second service", _first_option('selectbox', "Select a service for detailed analysis")),
+    ("Contract & Charges", "default", None),
+    ("Contract & Charges", "one contract", _first_option('multiselect', "Filter by Contract Type")),
+    ("Churn Prediction", "default", None),
+    ("Churn Prediction", "rule-based", _rule_based),
+    ("Recommendations", "default", None),
+]
+
+
+# Synthetic dataset of `rows` customers, generated once and kept in BENCH_DIR
+def ensure_dataset(rows, seed=42, bench_dir=BENCH_DIR):
+    from data_loader import ChunkWriter
+    from synthetic_data import iter_synthetic_chunks
+
+    path = os.path.join(bench_dir, f"synthetic_{rows}_{seed}.parquet")
+    if not os.path.exists(path):
+        os.makedirs(bench_dir, exist_ok=True)
+        partial = os.path.join(bench_dir, f"synthetic_{rows}_{seed}.partial.parquet")
+        writer = ChunkWriter(partial)
+        try:
+            for chunk in iter_synthetic_chunks(rows, seed=seed, workers=os.cpu_count() or 1):
+                writer.write(chunk)
+        finally:
+            writer.close()
+        os.replace(partial, path)
+    return path
+
+
+# Render every scenario through AppTest in this process. The data source and
+# caches are set through the environment by run_dataset(). Each scenario is
+# rendered twice: "cold" is the first render of that page and widget state,
+# "warm" the rerun served from the figure and filter caches. Peak RSS is the
+# process peak so far, so it includes the data loading and earlier scenarios.
+# The startup entry is the first script run: loading the data and building
+# the aggregates, plus the Executive Summary shown by default.
+def run_scenarios(timeout, trace_allocations=False):
+    from streamlit.testing.v1 import AppTest
+
+    from data_loader import peak_memory
+    from memory_accounting import SNAPSHOTS, accounting_report
+
+    # Deep sizes of the app's shared objects after a scenario and, when
+    # tracing, the allocation sites that grew most during it
+    def memory(result):
+        report = accounting_report(top_entries=5)
+        result.update(accounted_mb=report['accounted_mb'], objects=report['objects'],
+                      cache_entries=report['cache_entries'])
+        if trace_allocations:
+            SNAPSHOTS.take()
+            result['allocations'] = SNAPSHOTS.diff(limit=10)
+        return result
+
+    if trace_allocations:
+        SNAPSHOTS.take()
+    results = []
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    start = time.perf_counter()
+    at.run()
+    results.append(memory({'page': 'startup', 'state': 'default', 'cold_s': time.perf_counter() - start,
+                           'warm_s': None, 'peak_rss_mb': peak_memory()[0], 'payload_bytes': 0, 'charts': 0,
+                           'errors': [e.message for e in at.exception]}))
+    for page, state, apply in SCENARIOS:
+        at.sidebar.radio[0].set_value(page)
+        if apply is not None:
+            at.run()
+            apply(at)
+        timings = []
+        for attempt in range(2):
+            start = time.perf_counter()
+            at.run()
+            timings.append(time.perf_counter() - start)
+        charts = at.get("plotly_chart")
+        results.append(memory({'page': page, 'state': state, 'cold_s': timings[0], 'warm_s': timings[1],
+                               'peak_rss_mb': peak_memory()[0],
+                               'payload_bytes': sum(len(chart.proto.spec) for chart in charts),
+                               'charts': len(charts), 'errors': [e.message for e in at.exception]}))
+        # Back to default widgets for the next scenario; the caches are per
+        # process, so they stay warm
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        at.run()
+    return results
+
+
+# Run the scenarios against one dataset in a fresh process, with fresh
+# caches, so every dataset starts cold and its memory is measured alone
+def run_dataset(path, timeout, trace_allocations=False):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, CHURN_DATA_PATH=os.path.abspath(path), CHURN_CACHE_DIR=cache_dir,
+                   CHURN_DELTA_DIR=os.path.join(cache_dir, "deltas"))
+        command = [sys.executable, os.path.abspath(__file__), "--scenarios", "--timeout", str(timeout)]
+        if trace_allocations:
+            command.append("--tracemalloc")
+        out = subprocess.run(command, env=env, capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(f"benchmark of {path} failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+# Metrics of results that exceed the baseline by more than tolerance
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    previous = {(r['rows'], r['page'], r['state']): r for r in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        base = previous.get((result['rows'], result['page'], result['state']))
+        if base is None:
+            continue
+        for metric in ['cold_s', 'warm_s', 'peak_rss_mb', 'accounted_mb', 'payload_bytes']:
+            new, old = result.get(metric), base.get(metric)
+            if new is None or old is None or new <= old * (1 + tolerance):
+                continue
+            if metric.endswith('_s') and new - old < MIN_TIME_REGRESSION:
+                continue
+            regressions.append({'rows': result['rows'], 'page': result['page'], 'state': result['state'],
+                                'metric': metric, 'baseline': old, 'current': new})
+    return regressions
+
+
+def print_results(results):
+    print(f"{'rows':>11}  {'page':<22} {'state':<15} {'cold s':>8} {'warm s':>8} {'RSS MB':>8} {'app MB':>8} "
+          f"{'payload KB':>11}")
+    for r in results['results']:
+        warm = f"{r['warm_s']:8.3f}" if r['warm_s'] is not None else f"{'':8}"
+        print(f"{r['rows']:>11,}  {r['page']:<22} {r['state']:<15} {r['cold_s']:8.3f} {warm} "
+              f"{r['peak_rss_mb']:8.0f} {r['accounted_mb']:8.1f} {r['payload_bytes'] / 1024:11.1f}")
+        for error in r['errors']:
+            print(f"    error: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every dashboard page headlessly at several data sizes.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="dataset sizes to benchmark")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results.json"), help="where to write the results")
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"),
+                        help="results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed increase over the baseline, as a fraction")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per page run")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="record the allocation sites that grew most in every scenario (slow, skips the baseline)")
+    parser.add_argument("--scenarios", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.scenarios:
+        print(json.dumps(run_scenarios(args.timeout, args.tracemalloc)))
+        return
+
+    results = {'created': time.strftime("%Y-%m-%dT%H:%M:%S"), 'python': platform.python_version(),
+               'machine': platform.machine(), 'cpus': os.cpu_count(), 'results': []}
+    for rows in args.rows:
+        print(f"Benchmarking {rows:,} rows...", file=sys.stderr)
+        for result in run_dataset(ensure_dataset(rows), args.timeout, args.tracemalloc):
+            results['results'].append(dict(result, rows=rows))
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print_results(results)
+
+    if args.tracemalloc:
+        # Tracing slows every allocation down, so the timings are not comparable
+        print("Allocation tracing was on, not comparing against the baseline.")
+    elif args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['rows']:,} rows, {r['page']} ({r['state']}): "
+                  f"{r['metric']} {r['baseline']:.3f} -> {r['current']:.3f}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
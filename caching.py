@@ -0,0 +1,119 @@
+import os
+import sys
+import threading
+import types
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+# Byte budget of the filtered-subset cache, override with CHURN_FILTER_CACHE_MB
+FILTER_CACHE_BYTES = int(float(os.environ.get("CHURN_FILTER_CACHE_MB", 256)) * 2 ** 20)
+# Byte budget of the finished-figure cache, override with CHURN_FIGURE_CACHE_MB
+FIGURE_CACHE_BYTES = int(float(os.environ.get("CHURN_FIGURE_CACHE_MB", 64)) * 2 ** 20)
+
+
+# Approximate deep size in bytes of cached values and of the objects behind
+# them. Objects reached twice, like a frame shared by two attributes, are
+# counted once; buffers shared between distinct frames are not detected.
+def deep_size(value, seen=None):
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, 'to_plotly_json'):
+        return len(value.to_json())  # a Plotly figure, counted as the JSON sent to the browser
+    if isinstance(value, LRUCache):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(deep_size(k, seen) + deep_size(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset, deque)):
+        return sys.getsizeof(value) + sum(deep_size(v, seen) for v in value)
+    if isinstance(value, (type, types.ModuleType, types.FunctionType, types.MethodType)):
+        return 0
+    if hasattr(value, '__dict__'):
+        # Instances of the app's own classes: the aggregates, indexes, models
+        return sys.getsizeof(value) + deep_size(vars(value), seen)
+    return sys.getsizeof(value)
+
+
+# Canonical, hashable form of a filter selection: the order of the columns
+# and of the values picked in a multiselect does not change the key
+def filter_key(filters):
+    return tuple(sorted((col, tuple(sorted(map(str, values)))) for col, values in filters.items()))
+
+
+# Least-recently-used cache bounded by the total deep size of its values.
+# Safe to share between sessions; counts hits, misses and evictions.
+class LRUCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, nbytes=None):
+        nbytes = deep_size(value) if nbytes is None else nbytes
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return value  # larger than the whole budget, do not keep it
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+        return value
+
+    # Cached value for key, computing and storing it on a miss
+    def get_or_compute(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, compute())
+        return value
+
+    # Key and size in bytes of every entry, least recently used first
+    def entries(self):
+        with self._lock:
+            return [(key, nbytes) for key, (_, nbytes) in self._entries.items()]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'MB': self.nbytes / 2 ** 20,
+            'budget MB': self.max_bytes / 2 ** 20,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit rate (%)': self.hits / lookups * 100 if lookups else 0.0,
+            'evictions': self.evictions,
+        }
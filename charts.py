@@ -0,0 +1,91 @@
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Colours of the churn classes, matching the rest of the app
+CHURN_COLORS = {'No': '#3498db', 'Yes': '#e74c3c'}
+HISTOGRAM_BINS = 40
+
+
+# Five-number summary behind a box plot, with Tukey fences at 1.5 IQR
+# pulled in to the most extreme values inside them
+def box_stats(values):
+    values = np.sort(values[np.isfinite(values)])
+    if not len(values):
+        return None
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {'q1': q1, 'median': median, 'q3': q3, 'mean': values.mean(),
+            'lowerfence': inside[0], 'upperfence': inside[-1], 'count': len(values)}
+
+
+# Histogram counts of column per value of `by` on shared bin edges, plus
+# the box statistics of every class. The result depends on the number of
+# bins and classes only, not on the number of rows. Box statistics already
+# known, e.g. from quantile sketches, can be passed in as box ({class: stats}).
+def distribution_summary(df, column, by='Churn', bins=HISTOGRAM_BINS, box=None):
+    values = df[column].to_numpy(dtype='float64')
+    finite = np.isfinite(values)
+    if finite.any():
+        low, high = values[finite].min(), values[finite].max()
+    else:
+        low, high = 0.0, 1.0
+    edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+    classes = df[by].astype('category')
+    summary = {'column': column, 'edges': edges, 'counts': {}, 'box': {}}
+    for code, name in enumerate(classes.cat.categories):
+        class_values = values[(classes.cat.codes.to_numpy() == code) & finite]
+        summary['counts'][name] = np.histogram(class_values, bins=edges)[0]
+        summary['box'][name] = box[name] if box is not None else box_stats(class_values)
+    return summary
+
+
+# Stacked histogram with a box plot per class above it, like
+# px.histogram(..., color=by, marginal='box') but drawn from a summary
+def distribution_figure(summary, title, xaxis_title):
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8],
+                        vertical_spacing=0.02)
+    edges = summary['edges']
+    centers = (edges[:-1] + edges[1:]) / 2
+    for name, counts in summary['counts'].items():
+        color = CHURN_COLORS.get(str(name))
+        stats = summary['box'][name]
+        if stats is not None:
+            fig.add_trace(go.Box(y=[str(name)], q1=[stats['q1']], median=[stats['median']],
+                                 q3=[stats['q3']], mean=[stats['mean']],
+                                 lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']],
+                                 orientation='h', name=str(name), legendgroup=str(name),
+                                 showlegend=False, marker_color=color), row=1, col=1)
+        fig.add_trace(go.Bar(x=centers, y=counts, width=np.diff(edges), name=str(name),
+                             legendgroup=str(name), marker_color=color,
+                             customdata=np.column_stack([edges[:-1], edges[1:]]),
+                             hovertemplate='%{customdata[0]:.2f} - %{customdata[1]:.2f}<br>'
+                                           'Count: %{y}<extra>' + str(name) + '</extra>'),
+                      row=2, col=1)
+    fig.update_layout(title=title, barmode='relative', bargap=0, legend_title_text='Churn')
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_xaxes(title_text=xaxis_title, row=2, col=1)
+    fig.update_yaxes(title_text='Count', row=2, col=1)
+    return fig
+
+
+# Pie with one slice per row of a table of precomputed counts, so the
+# figure carries the categories only instead of a column of raw rows
+def pie_figure(table, names, title, colors, values='Customers'):
+    fig = go.Figure(go.Pie(labels=table[names].astype(str).to_numpy(), values=table[values].to_numpy(),
+                           marker_colors=colors, textposition='inside', textinfo='percent+label'))
+    fig.update_layout(title=title)
+    return fig
+
+
+# Grouped bars of customers per value of column and churn status, from the
+# long table of ChurnAggregates.churn_split
+def churn_split_figure(split, column, title, xaxis_title):
+    fig = go.Figure()
+    for name, rows in split.groupby('Churn', sort=True, observed=True):
+        fig.add_trace(go.Bar(x=rows[column].astype(str).to_numpy(), y=rows['Count'].to_numpy(),
+                             name=str(name), marker_color=CHURN_COLORS.get(str(name))))
+    fig.update_layout(title=title, barmode='group', legend_title_text='Churn',
+                      xaxis_title=xaxis_title, yaxis_title='Count')
+    return fig
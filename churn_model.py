@@ -0,0 +1,400 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_loader import CACHE_DIR, CATEGORICAL_COLUMNS, CHUNK_SIZE, iter_source_chunks
+
+# Bump whenever the artifact layout or the feature encoding changes
+MODEL_FORMAT_VERSION = 1
+MODEL_CATEGORICAL = [col for col in CATEGORICAL_COLUMNS if col != 'Churn']
+MODEL_NUMERIC = ['tenure', 'MonthlyCharges', 'TotalCharges']
+# Sources up to this many rows are kept in memory when fitting takes several epochs
+IN_MEMORY_ROWS = 1_000_000
+# Training settings, stored with every artifact
+DEFAULT_CONFIG = {
+    'batch_size': 1024,
+    'learning_rate': 0.01,
+    'l2': 1e-5,
+    'epochs': 1,
+    'min_steps': 3000,  # small datasets get more epochs, up to max_epochs
+    'max_epochs': 30,
+    'holdout': 0.1,
+    'seed': 42,
+}
+# Model artifacts kept per configuration in the cache directory
+KEEP_ARTIFACTS = 3
+# Seconds before a background fit that failed is tried again for the same dataset
+FIT_RETRY_SECONDS = 600
+
+
+# Frame split into chunks of at most chunk_size rows, as a chunk source
+def frame_chunks(df, chunk_size=CHUNK_SIZE):
+    return lambda: (df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size))
+
+
+# Chunks of a source file read from disk on every pass, as a chunk source
+def file_chunks(path, chunk_size=CHUNK_SIZE):
+    return lambda: iter_source_chunks(path, chunk_size)
+
+
+# Area under the ROC curve from the ranks of the scores
+def roc_auc(labels, scores):
+    labels = np.asarray(labels, dtype=bool)
+    positives, negatives = labels.sum(), (~labels).sum()
+    if not positives or not negatives:
+        return float('nan')
+    ranks = pd.Series(scores).rank().to_numpy()
+    return float((ranks[labels].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+# Logistic regression on one-hot encoded categories and standardized
+# numeric columns. The encoding is learned from the data, so the model
+# follows whatever dataset it is fitted on.
+class ChurnModel:
+    def __init__(self, config=None):
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        self.categories = {}
+        self.frequencies = {}
+        self.mean = {}
+        self.std = {}
+        self.weights = None
+        self.bias = 0.0
+        self.metrics = {}
+        # Version of the data the model was fitted on, and of the source file
+        # behind it; models of the same source can be warm-started
+        self.dataset = None
+        self.source = None
+
+    # Learn the categories and numeric scaling from one pass over the chunks
+    def fit_encoding(self, chunks):
+        counts = {col: {} for col in MODEL_CATEGORICAL}
+        sums = dict.fromkeys(MODEL_NUMERIC, 0.0)
+        squares = dict.fromkeys(MODEL_NUMERIC, 0.0)
+        rows = 0
+        for chunk in chunks():
+            rows += len(chunk)
+            for col in MODEL_CATEGORICAL:
+                for value, count in chunk[col].value_counts().items():
+                    counts[col][value] = counts[col].get(value, 0) + int(count)
+            for col in MODEL_NUMERIC:
+                values = chunk[col].to_numpy(dtype='float64')
+                values = values[np.isfinite(values)]
+                sums[col] += values.sum()
+                squares[col] += (values ** 2).sum()
+        for col in MODEL_CATEGORICAL:
+            self.categories[col] = sorted(str(value) for value in counts[col])
+            total = max(sum(counts[col].values()), 1)
+            self.frequencies[col] = [counts[col][value] / total for value in sorted(counts[col], key=str)]
+        for col in MODEL_NUMERIC:
+            self.mean[col] = sums[col] / max(rows, 1)
+            self.std[col] = math.sqrt(max(squares[col] / max(rows, 1) - self.mean[col] ** 2, 0)) or 1.0
+        return rows
+
+    @property
+    def width(self):
+        return sum(len(values) for values in self.categories.values()) + len(MODEL_NUMERIC)
+
+    # Feature matrix of df. A column missing from df is filled with its
+    # average over the training data: category frequencies for categorical
+    # columns and zero (the mean) for standardized numeric ones.
+    def design_matrix(self, df):
+        X = np.zeros((len(df), self.width), dtype='float32')
+        offset = 0
+        rows = np.arange(len(df))
+        for col in MODEL_CATEGORICAL:
+            levels = self.categories[col]
+            if col in df.columns:
+                values = df[col]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    # Translate the stored codes once per category, the trailing -1 keeps missing values unknown
+                    lookup = np.append(pd.Index(levels).get_indexer(values.cat.categories.astype(str)), -1)
+                    codes = lookup[values.cat.codes.to_numpy()]
+                else:
+                    codes = pd.Index(levels).get_indexer(values.astype(str))
+                known = codes >= 0
+                X[rows[known], offset + codes[known]] = 1.0
+            else:
+                X[:, offset:offset + len(levels)] = self.frequencies[col]
+            offset += len(levels)
+        for col in MODEL_NUMERIC:
+            if col in df.columns:
+                values = (df[col].to_numpy(dtype='float64') - self.mean[col]) / self.std[col]
+                X[:, offset] = np.nan_to_num(values)
+            offset += 1
+        return X
+
+    # Churn probability (0 to 1) of every row of df
+    def predict_proba(self, df):
+        return 1.0 / (1.0 + np.exp(-(self.design_matrix(df) @ self.weights + self.bias)))
+
+    # Fit by mini-batch gradient descent with Adam step sizes, streaming the
+    # chunks once per epoch so the data never has to fit in memory. A fixed
+    # random share of every chunk is held out; in the last epoch each held
+    # out part is scored before training on its chunk (progressive
+    # validation), which needs no extra pass over the data.
+    def fit(self, chunks, warm_start=False):
+        cfg = self.config
+        rows = self.fit_encoding(chunks) if not (warm_start and self.weights is not None) else None
+        if rows is not None:
+            self.weights = np.zeros(self.width, dtype='float64')
+            self.bias = 0.0
+            steps_per_epoch = max(rows * (1 - cfg['holdout']) / cfg['batch_size'], 1)
+            epochs = min(max(cfg['epochs'], math.ceil(cfg['min_steps'] / steps_per_epoch)), cfg['max_epochs'])
+        else:
+            epochs = cfg['epochs']
+        if epochs > 1 and rows is not None and rows <= IN_MEMORY_ROWS:
+            # Small enough to keep, so later epochs do not read the source again
+            cached = list(chunks())
+            chunks = lambda: iter(cached)
+
+        params = np.append(self.weights, self.bias)
+        moment, velocity = np.zeros_like(params), np.zeros_like(params)
+        beta1, beta2, step = 0.9, 0.999, 0
+        rng = np.random.default_rng(cfg['seed'])
+        for epoch in range(epochs):
+            holdout_labels, holdout_scores = [], []
+            train_loss, train_rows = 0.0, 0
+            for index, chunk in enumerate(chunks()):
+                X = self.design_matrix(chunk)
+                y = (chunk['Churn'] == 'Yes').to_numpy(dtype='float64')
+                held = np.random.default_rng([cfg['seed'], index]).random(len(chunk)) < cfg['holdout']
+                if epoch == epochs - 1 and held.any():
+                    holdout_labels.append(y[held])
+                    holdout_scores.append(X[held] @ params[:-1] + params[-1])
+                train = rng.permutation(np.flatnonzero(~held))
+                for start in range(0, len(train), cfg['batch_size']):
+                    batch = train[start:start + cfg['batch_size']]
+                    Xb = X[batch]
+                    p = 1.0 / (1.0 + np.exp(-(Xb @ params[:-1] + params[-1])))
+                    error = p - y[batch]
+                    grad = np.append(Xb.T @ error, error.sum()) / len(batch)
+                    grad[:-1] += cfg['l2'] * params[:-1]
+                    step += 1
+                    moment = beta1 * moment + (1 - beta1) * grad
+                    velocity = beta2 * velocity + (1 - beta2) * grad ** 2
+                    params -= (cfg['learning_rate'] * (moment / (1 - beta1 ** step))
+                               / (np.sqrt(velocity / (1 - beta2 ** step)) + 1e-8))
+                    if epoch == epochs - 1:
+                        p = np.clip(p, 1e-7, 1 - 1e-7)
+                        train_loss -= (y[batch] * np.log(p) + (1 - y[batch]) * np.log(1 - p)).sum()
+                        train_rows += len(batch)
+        self.weights, self.bias = params[:-1], float(params[-1])
+        self.metrics = {'epochs': epochs, 'steps': step, 'train_rows': train_rows,
+                        'train_log_loss': float(train_loss / max(train_rows, 1))}
+        if holdout_labels:
+            labels = np.concatenate(holdout_labels)
+            p = np.clip(1.0 / (1.0 + np.exp(-np.concatenate(holdout_scores))), 1e-7, 1 - 1e-7)
+            self.metrics.update({
+                'holdout_rows': len(labels),
+                'holdout_log_loss': float(-(labels * np.log(p) + (1 - labels) * np.log(1 - p)).mean()),
+                'holdout_accuracy': float(((p >= 0.5) == labels).mean()),
+                'holdout_auc': roc_auc(labels, p),
+            })
+        return self
+
+    # Weight of every encoded feature, largest effect first
+    def coefficients(self):
+        names = [f'{col}={value}' for col in MODEL_CATEGORICAL for value in self.categories[col]]
+        coef = pd.DataFrame({'Feature': names + MODEL_NUMERIC, 'Weight': self.weights})
+        return coef.reindex(coef['Weight'].abs().sort_values(ascending=False).index).reset_index(drop=True)
+
+    def to_dict(self):
+        return {
+            'format_version': MODEL_FORMAT_VERSION,
+            'config': self.config,
+            'dataset': self.dataset,
+            'source': self.source,
+            'categories': {col: [str(v) for v in values] for col, values in self.categories.items()},
+            'frequencies': self.frequencies,
+            'mean': self.mean,
+            'std': self.std,
+            'weights': [float(w) for w in self.weights],
+            'bias': self.bias,
+            'metrics': self.metrics,
+        }
+
+    # Write the model to a JSON artifact, atomically
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+        os.replace(tmp_path, path)
+        return path
+
+    # Model stored by save(). Raises ValueError for an artifact written by
+    # an incompatible version.
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            state = json.load(f)
+        if state.get('format_version') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"model artifact {path} has format {state.get('format_version')}, "
+                             f"expected {MODEL_FORMAT_VERSION}")
+        return cls.load_state(state)
+
+    # Model from the dictionary of to_dict()
+    @classmethod
+    def load_state(cls, state):
+        model = cls(state['config'])
+        model.dataset = state['dataset']
+        model.source = state.get('source')
+        model.categories = state['categories']
+        model.frequencies = state['frequencies']
+        model.mean, model.std = state['mean'], state['std']
+        model.weights = np.array(state['weights'], dtype='float64')
+        model.bias = state['bias']
+        model.metrics = dict(state['metrics'])
+        return model
+
+
+# Fit a model on a frame already in memory
+def fit_frame(df, config=None):
+    return ChurnModel(config).fit(frame_chunks(df))
+
+
+# Fit a model on a source file without loading it whole
+def fit_file(path, config=None, chunk_size=CHUNK_SIZE):
+    return ChurnModel(config).fit(file_chunks(path, chunk_size))
+
+
+# Short key of a training configuration, part of the artifact file names
+def config_key(config):
+    text = json.dumps({'format_version': MODEL_FORMAT_VERSION, **config}, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+
+def _artifact_path(cache_dir, config, dataset):
+    digest = hashlib.sha256(str(dataset).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, "churn-model-{}-{}.json".format(config_key(config), digest))
+
+
+# Fitted models persisted in the cache directory, keyed by dataset version
+# and training configuration. get() returns at once: the artifact of the
+# current version when there is one, otherwise the last model while a
+# background thread fits the new one. A model of the same source file (the
+# same base data plus deltas) is warm-started from its weights instead of
+# being fitted from scratch. Only the very first fit blocks.
+class ModelStore:
+    def __init__(self, config=None, cache_dir=CACHE_DIR):
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        self.cache_dir = cache_dir
+        self.model = None
+        self.training = None  # dataset version being fitted in the background
+        self.error = None
+        self.failed = None  # (dataset version, time) of the last failed background fit
+        self._lock = threading.Lock()
+
+    # Model to serve for dataset, fitting one on chunks when needed. source
+    # identifies the file behind dataset and defaults to dataset itself.
+    def get(self, dataset, chunks, source=None):
+        dataset, source = str(dataset), str(dataset if source is None else source)
+        with self._lock:
+            if self.model is not None and self.model.dataset == dataset:
+                return self.model
+            loaded = self._load(_artifact_path(self.cache_dir, self.config, dataset))
+            if loaded is not None:
+                self.model = loaded
+                return loaded
+            previous = self.model or self._latest()
+            if previous is None:
+                self.model = self._fit(dataset, source, chunks, None)
+                return self.model
+            self.model = previous
+            if self.training != dataset and not self._failed_recently(dataset):
+                self.training = dataset
+                threading.Thread(target=self._fit_in_background, args=(dataset, source, chunks, previous),
+                                 daemon=True).start()
+            return previous
+
+    def _fit_in_background(self, dataset, source, chunks, previous):
+        try:
+            model = self._fit(dataset, source, chunks, previous)
+        except Exception as error:  # keep serving the previous model
+            with self._lock:
+                self.error, self.training = error, None
+                self.failed = (dataset, time.monotonic())
+            return
+        with self._lock:
+            if self.training == dataset:
+                self.model, self.training, self.error, self.failed = model, None, None, None
+
+    # A failing fit is not restarted on every rerun: the same dataset version
+    # is retried only after FIT_RETRY_SECONDS, a new version at once
+    def _failed_recently(self, dataset):
+        return (self.failed is not None and self.failed[0] == dataset
+                and time.monotonic() - self.failed[1] < FIT_RETRY_SECONDS)
+
+    def _fit(self, dataset, source, chunks, previous):
+        start = time.perf_counter()
+        if previous is not None and previous.source == source and previous.config == self.config:
+            model = ChurnModel.load_state(previous.to_dict())
+            model.fit(chunks, warm_start=True)
+            model.metrics['warm_start'] = True
+        else:
+            model = ChurnModel(self.config).fit(chunks)
+        model.metrics['train_seconds'] = time.perf_counter() - start
+        model.dataset, model.source = dataset, source
+        os.makedirs(self.cache_dir, exist_ok=True)
+        model.save(_artifact_path(self.cache_dir, self.config, dataset))
+        self._prune()
+        return model
+
+    def _load(self, path):
+        try:
+            return ChurnModel.load(path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _artifacts(self):
+        prefix = "churn-model-{}-".format(config_key(self.config))
+        try:
+            names = [name for name in os.listdir(self.cache_dir)
+                     if name.startswith(prefix) and name.endswith(".json")]
+        except OSError:
+            return []
+        paths = [os.path.join(self.cache_dir, name) for name in names]
+        return sorted(paths, key=os.path.getmtime, reverse=True)
+
+    # Most recently written model of this configuration, for any dataset
+    def _latest(self):
+        for path in self._artifacts():
+            model = self._load(path)
+            if model is not None:
+                return model
+        return None
+
+    def _prune(self):
+        for path in self._artifacts()[KEEP_ARTIFACTS:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit the logistic churn model on a CSV or Parquet file.")
+    parser.add_argument("input", help="CSV or Parquet file to train on")
+    parser.add_argument("output", help="model artifact (JSON) to write")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per chunk")
+    for name, value in DEFAULT_CONFIG.items():
+        parser.add_argument("--" + name.replace('_', '-'), type=type(value), default=value)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    config = {name: getattr(args, name) for name in DEFAULT_CONFIG}
+    model = fit_file(args.input, config, args.chunk_size)
+    model.save(args.output)
+    print(f"Trained in {time.perf_counter() - start:.1f} s, saved to {args.output}")
+    for name, value in model.metrics.items():
+        print(f"  {name}: {value:.4f}" if isinstance(value, float) else f"  {name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import sys
+
+import pandas as pd
+
+# Page views share the loaded frame, copy-on-write keeps a write through
+# one view from reaching the others (always on from pandas 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # the Arrow cache is optional, plain CSV parsing still works
+    feather = None
+
+try:
+    import resource
+except ImportError:  # not on Windows, peak memory is then unknown
+    resource = None
+
+# Location of the churn extract (CSV or Parquet), override with CHURN_DATA_PATH
+DATA_PATH = os.environ.get(
+    "CHURN_DATA_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "churn_dataset.csv"),
+)
+# Directory holding the cleaned Arrow copies of the source file
+CACHE_DIR = os.environ.get(
+    "CHURN_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".churn_cache"),
+)
+# Daily delta files of new and changed customers, applied in name order
+DELTA_DIR = os.environ.get(
+    "CHURN_DELTA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "deltas"),
+)
+# Bump whenever clean_churn_data changes so stale cache files are ignored
+CACHE_VERSION = 3
+# "memory" loads every row, "stream" reads the source in bounded chunks,
+# "shared" maps a snapshot published once for every process on the host
+INGEST_MODE = os.environ.get("CHURN_INGEST_MODE", "memory")
+# Rows per chunk in streaming mode, this bounds peak memory
+CHUNK_SIZE = int(os.environ.get("CHURN_CHUNK_SIZE", 100_000))
+# Rows kept for charts of individual customers in streaming mode
+SAMPLE_SIZE = int(os.environ.get("CHURN_SAMPLE_SIZE", 50_000))
+
+SERVICE_COLUMNS = ['PhoneService', 'MultipleLines', 'InternetService', 'OnlineSecurity',
+                   'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies']
+TENURE_BINS = [0, 12, 24, 36, 48, 72]
+TENURE_LABELS = ['0-12', '13-24', '25-36', '37-48', '49+']
+CHARGES_BINS = [0, 40, 80, 120]
+CHARGES_LABELS = ['Low', 'Medium', 'High']
+# Low-cardinality columns stored as pandas categories
+CATEGORICAL_COLUMNS = ['gender', 'SeniorCitizen', 'Partner', 'Dependents'] + SERVICE_COLUMNS + \
+                      ['Contract', 'PaperlessBilling', 'PaymentMethod', 'Churn']
+
+
+# Apply the cleaning steps every page relies on
+def clean_churn_data(df):
+    # Convert TotalCharges to numeric
+    df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce')
+    # Fill missing values
+    df['TotalCharges'] = df['TotalCharges'].fillna(df['MonthlyCharges'])
+    # Convert SeniorCitizen to categorical
+    df['SeniorCitizen'] = df['SeniorCitizen'].map({0: 'No', 1: 'Yes'})
+    return df
+
+
+# Shrink the cleaned frame: categories for the string columns, an int8
+# churn flag next to Churn, int16 tenure and float32 charges. The binned
+# tenure_group and charges_group columns are added here once, so pages
+# never have to derive them from the shared frame.
+def compact_churn_data(df):
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    df['churn_flag'] = (df['Churn'] == 'Yes').astype('int8')
+    if df['tenure'].notna().all() and df['tenure'].abs().max() < 2 ** 15:
+        df['tenure'] = df['tenure'].astype('int16')
+    else:
+        df['tenure'] = df['tenure'].astype('float32')
+    for col in ['MonthlyCharges', 'TotalCharges']:
+        df[col] = df[col].astype('float32')
+    for col, values in _binned_columns(df).items():
+        df[col] = values
+    return df
+
+
+# Deep memory usage per column of one or more frames with the same
+# columns, largest first
+def memory_report(df, *more):
+    usage = df.memory_usage(deep=True, index=False)
+    for other in more:
+        usage = usage.add(other.memory_usage(deep=True, index=False), fill_value=0)
+    report = pd.DataFrame({'Column': usage.index,
+                           'Type': [str(df[col].dtype) for col in usage.index],
+                           'MB': usage.values / 2 ** 20})
+    return report.sort_values('MB', ascending=False, ignore_index=True)
+
+
+# Binned tenure and monthly charges groups used across the pages, taken
+# from the frame when it already carries them
+def group_columns(df):
+    if 'tenure_group' in df.columns and 'charges_group' in df.columns:
+        return {'tenure_group': df['tenure_group'], 'charges_group': df['charges_group']}
+    return _binned_columns(df)
+
+
+def _binned_columns(df):
+    return {
+        'tenure_group': pd.cut(df['tenure'], bins=TENURE_BINS, labels=TENURE_LABELS).rename('tenure_group'),
+        'charges_group': pd.cut(df['MonthlyCharges'], bins=CHARGES_BINS,
+                                labels=CHARGES_LABELS).rename('charges_group'),
+    }
+
+
+# Read the raw source file, choosing the parser from the extension
+def read_source(path):
+    if path.lower().endswith((".parquet", ".pq")):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+# Writes chunks of rows to a CSV or Parquet file as they arrive, choosing
+# the format from the extension like read_source()
+class ChunkWriter:
+    def __init__(self, path, float_format='%.4f'):
+        self.path = path
+        self.float_format = float_format
+        self.parquet = path.lower().endswith((".parquet", ".pq"))
+        self._writer = None
+        self._header = True
+
+    def write(self, chunk):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode='w' if self._header else 'a', header=self._header,
+                         index=False, float_format=self.float_format)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+# Peak resident memory in MB of this process and of the largest child
+# process, NaN where the platform does not report it
+def peak_memory():
+    if resource is None:
+        return float('nan'), float('nan')
+    scale = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss is in KB on Linux, bytes on macOS
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 2 ** 20
+    return own, children
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(cache_dir, manifest):
+    tmp_path = os.path.join(cache_dir, f"manifest.json.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(cache_dir, "manifest.json"))
+
+
+# Identify a source file by size, mtime and content hash.
+# The hash is only recomputed when size or mtime differ from the last run,
+# so a warm start costs one stat() instead of reading the whole file.
+def file_fingerprint(path, cache_dir=CACHE_DIR):
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    manifest = _read_manifest(cache_dir)
+    entry = manifest.get(path)
+    if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+        with open(path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        manifest[path] = entry
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_manifest(cache_dir, manifest)
+    return "v{}-{}-{}-{}".format(CACHE_VERSION, entry["size"], entry["mtime_ns"], entry["sha256"][:16])
+
+
+def _cache_path(path, key, cache_dir):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, "{}-{}.arrow".format(stem, key))
+
+
+# Remove cache files of the same source that belong to an older fingerprint
+def _prune_cache(path, keep, cache_dir):
+    stem = os.path.splitext(os.path.basename(path))[0] + "-"
+    for name in os.listdir(cache_dir):
+        full = os.path.join(cache_dir, name)
+        if name.startswith(stem) and name.endswith(".arrow") and full != keep:
+            try:
+                os.remove(full)
+            except OSError:
+                pass
+
+
+# Version of the configured dataset, it changes whenever the source file
+# does. None when the file is missing.
+def dataset_version(path=DATA_PATH, cache_dir=CACHE_DIR):
+    try:
+        return file_fingerprint(path, cache_dir)
+    except FileNotFoundError:
+        return None
+
+
+# Load and clean the churn dataset.
+# The cleaned frame is written once to an uncompressed Arrow IPC file keyed by
+# the source fingerprint; later starts memory-map that file instead of
+# re-parsing the CSV. Raises FileNotFoundError when the source is missing.
+def load_churn_data(path=DATA_PATH, cache_dir=CACHE_DIR):
+    if feather is None:
+        return compact_churn_data(clean_churn_data(read_source(path)))
+
+    key = file_fingerprint(path, cache_dir)
+    cache_path = _cache_path(path, key, cache_dir)
+    if os.path.exists(cache_path):
+        try:
+            return feather.read_table(cache_path, memory_map=True).to_pandas()
+        except (OSError, ValueError):
+            pass  # unreadable cache file, rebuild it below
+
+    df = compact_churn_data(clean_churn_data(read_source(path)))
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    feather.write_feather(df, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, cache_path)
+    _prune_cache(path, cache_path, cache_dir)
+    return df
+
+
+# Read a delta file of new and changed customers, cleaned like the main
+# dataset. A customer listed twice keeps its last record.
+def read_delta(path):
+    delta = compact_churn_data(clean_churn_data(read_source(path)))
+    return delta.drop_duplicates('customerID', keep='last').reset_index(drop=True)
+
+
+# Yield cleaned, compacted chunks of at most chunk_size rows without reading the whole file
+def iter_source_chunks(path=DATA_PATH, chunk_size=CHUNK_SIZE):
+    if path.lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield compact_churn_data(clean_churn_data(batch.to_pandas()))
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            yield compact_churn_data(clean_churn_data(chunk))
@@ -0,0 +1,125 @@
+import copy
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DELTA_DIR, read_delta
+
+
+# Rows of one input file with a hash index on customerID and a mask of the
+# rows that have not been replaced by a later delta
+class _Segment:
+    def __init__(self, df):
+        self.df = df
+        self.ids = pd.Index(df['customerID'] if 'customerID' in df.columns else [])
+        # pandas builds the hash table on first lookup, build it with the
+        # segment so the first delta does not pay for it
+        self.ids.get_indexer_for(self.ids[:1])
+        self.alive = np.ones(len(df), dtype=bool)
+
+
+# Names of the delta files in delta_dir, in the order they are applied
+def delta_files(delta_dir=DELTA_DIR):
+    if not os.path.isdir(delta_dir):
+        return []
+    return sorted(name for name in os.listdir(delta_dir) if name.lower().endswith(('.csv', '.parquet', '.pq')))
+
+
+# Concatenate row frames whose categorical columns may have different
+# categories. Categories missing from the first frame are appended to it,
+# so its codes stay valid, and every frame is recoded to the result; the
+# values never go through object.
+def _concat_rows(parts):
+    parts = list(parts)
+    for col in parts[0].select_dtypes('category').columns:
+        dtypes = [part[col].dtype for part in parts]
+        categories = dtypes[0].categories
+        for dtype in dtypes[1:]:
+            categories = categories.append(dtype.categories.difference(categories, sort=False))
+        dtype = pd.CategoricalDtype(categories, ordered=dtypes[0].ordered)
+        parts = [part if part[col].dtype == dtype else part.assign(**{col: part[col].cat.set_categories(categories)})
+                 for part in parts]
+    return pd.concat(parts, ignore_index=True)
+
+
+# The loaded dataset plus the deltas applied to it since startup.
+# Each delta is merged by customerID: rows it replaces are looked up through
+# the per-segment hash indexes and subtracted from the aggregates, then the
+# delta rows are added. Neither step touches the untouched rows, so a
+# refresh costs time in proportion to the delta, not the dataset. The
+# aggregates are updated on a copy and swapped in, so pages holding the
+# previous ones keep reading a consistent state.
+class IncrementalDataset:
+    def __init__(self, df, aggregates):
+        self.aggregates = aggregates
+        self.applied = []
+        # Delta file name -> (size, mtime) when it was applied
+        self._versions = {}
+        self._segments = [_Segment(df)]
+        self._frame = df
+        self._lock = threading.Lock()
+
+    # Current rows. After a delta they are concatenated once from the live
+    # rows of every segment, with the categories lined up, when a page first
+    # asks for them.
+    @property
+    def frame(self):
+        with self._lock:
+            if self._frame is None:
+                self._frame = _concat_rows(seg.df[seg.alive] if not seg.alive.all() else seg.df
+                                           for seg in self._segments)
+            return self._frame
+
+    # Frames holding the rows in memory: every segment, replaced rows
+    # included, and their concatenation once a page has asked for it
+    def frames(self):
+        with self._lock:
+            frames = [seg.df for seg in self._segments]
+            if self._frame is not None and self._frame is not frames[0]:
+                frames.append(self._frame)
+            return frames
+
+    # Cheap view of the current rows for one page run. Under copy-on-write a
+    # write to the view copies the touched column, the shared frame never
+    # changes.
+    def view(self):
+        return self.frame.copy(deep=False)
+
+    # Merge cleaned delta frames, in order
+    def apply(self, *deltas):
+        with self._lock:
+            self._merge(deltas)
+
+    def _merge(self, deltas):
+        aggregates = copy.deepcopy(self.aggregates)
+        for delta in deltas:
+            ids = delta['customerID']
+            for seg in self._segments:
+                positions = seg.ids.get_indexer_for(ids)
+                positions = positions[positions >= 0]
+                positions = positions[seg.alive[positions]]
+                if len(positions):
+                    aggregates.subtract(seg.df.iloc[positions])
+                    seg.alive[positions] = False
+            aggregates.update(delta)
+            self._segments.append(_Segment(delta))
+            self._frame = None
+        self.aggregates = aggregates.flush()
+
+    # Apply the delta files in delta_dir that are new, or were rewritten
+    # since they were applied (see snapshot_version()). Returns the names of
+    # the files applied by this call.
+    def refresh(self, delta_dir=DELTA_DIR):
+        versions = {}
+        for name in delta_files(delta_dir):
+            info = os.stat(os.path.join(delta_dir, name))
+            versions[name] = (info.st_size, info.st_mtime_ns)
+        with self._lock:
+            new = [name for name, version in versions.items() if self._versions.get(name) != version]
+            if new:
+                self._merge([read_delta(os.path.join(delta_dir, name)) for name in new])
+                self.applied.extend(new)
+                self._versions.update((name, versions[name]) for name in new)
+        return new
@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+
+# Scatter plots with more points than this are downsampled on the server,
+# override with CHURN_SCATTER_MAX_POINTS
+SCATTER_MAX_POINTS = int(os.environ.get("CHURN_SCATTER_MAX_POINTS", 5000))
+
+
+# Grid cell of every row on a bins x bins grid over the x and y ranges
+def _grid_cells(x, y, bins):
+    cells = np.zeros(len(x), dtype='int64')
+    for values in (x, y):
+        low, high = values.min(), values.max()
+        scale = bins / (high - low) if high > low else 0.0
+        codes = np.minimum(((values - low) * scale).astype('int64'), bins - 1)
+        cells = cells * bins + codes
+    return cells
+
+
+# Rows of df to draw in an x/y scatter coloured by the `by` column, at most
+# about max_points of them. Rows are sampled per grid cell and per value
+# of `by`, in proportion to their count, but every non-empty cell keeps at
+# least one row of each value present. Dense regions are thinned while
+# sparse regions and rare churners in them stay visible, so the churn
+# pattern of the full scatter is kept. df is returned unchanged when it is
+# already small enough. The sample is deterministic for a given df.
+def downsample_points(df, x, y, by='Churn', max_points=SCATTER_MAX_POINTS, bins=64, seed=0):
+    if len(df) <= max_points:
+        return df
+    # Keep the number of grid cells well under the budget so it holds
+    bins = max(1, min(bins, int(np.sqrt(max_points / 4))))
+    xs = df[x].to_numpy(dtype='float64')
+    ys = df[y].to_numpy(dtype='float64')
+    rows = np.flatnonzero(np.isfinite(xs) & np.isfinite(ys))
+    classes = df[by].astype('category').cat.codes.to_numpy().astype('int64')[rows] + 1
+    group_of_row = _grid_cells(xs[rows], ys[rows], bins) * (classes.max() + 1) + classes
+    counts = np.bincount(group_of_row)
+
+    # One row per non-empty group, the rest of the budget shared in
+    # proportion to group size
+    occupied = np.count_nonzero(counts)
+    fraction = max(max_points - occupied, 0) / max(len(rows) - occupied, 1)
+    quota = np.minimum(counts, 1 + np.floor((counts - 1) * fraction).astype('int64'))
+
+    # Rank rows within their group by a random key, keep the first quota
+    keys = np.random.default_rng(seed).random(len(rows))
+    order = np.lexsort((keys, group_of_row))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(len(rows)) - starts[group_of_row[order]]
+    keep = np.sort(order[rank < quota[group_of_row[order]]])
+    return df.iloc[rows[keep]]
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from data_loader import CATEGORICAL_COLUMNS
+
+IMPORTANCE_CATEGORICAL = [col for col in CATEGORICAL_COLUMNS if col != 'Churn']
+IMPORTANCE_NUMERIC = ['tenure', 'MonthlyCharges', 'TotalCharges']
+
+
+# Customers and churned customers per level of every column, from the
+# aggregate tables. Returns the column index of each level with its counts;
+# the levels of a column are contiguous.
+def _contingency(aggregates, columns):
+    tables = [aggregates.table([col]) for col in columns]
+    column = np.repeat(np.arange(len(columns)), [len(table) for table in tables])
+    n = np.concatenate([table['Customers'].to_numpy(dtype='float64') for table in tables])
+    c = np.concatenate([table['Churned'].to_numpy(dtype='float64') for table in tables])
+    return column, n, c
+
+
+# Mutual information with churn (in bits), chi-square statistic, Cramér's V
+# and the spread between the highest and lowest churn rate of its levels,
+# for every categorical column, from the aggregate tables
+def categorical_importance(aggregates, columns=IMPORTANCE_CATEGORICAL):
+    column, n, c = _contingency(aggregates, columns)
+    k = len(columns)
+    total = np.bincount(column, weights=n, minlength=k)
+    churned = np.bincount(column, weights=c, minlength=k)
+    N, C = total[column], churned[column]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Cells of the 2 x levels table: churned and stayed
+        terms = 0.0
+        chi2 = 0.0
+        for observed, class_total in [(c, C), (n - c, N - C)]:
+            expected = n * class_total / N
+            terms = terms + np.where(observed > 0, observed / N * np.log2(observed * N / (n * class_total)), 0.0)
+            chi2 = chi2 + np.where(expected > 0, (observed - expected) ** 2 / expected, 0.0)
+        rate = c / n * 100
+
+    starts = np.flatnonzero(np.r_[True, column[1:] != column[:-1]])
+    present = column[starts]
+    spread = np.full(k, np.nan)
+    spread[present] = np.maximum.reduceat(rate, starts) - np.minimum.reduceat(rate, starts)
+    chi2 = np.bincount(column, weights=chi2, minlength=k)
+    return pd.DataFrame({
+        'Feature': columns,
+        'Mutual Information': np.bincount(column, weights=terms, minlength=k),
+        'Chi-square': chi2,
+        "Cramér's V": np.sqrt(chi2 / np.where(total > 0, total, np.nan)),
+        'Churn Rate Spread (pp)': spread,
+    }).sort_values('Mutual Information', ascending=False, ignore_index=True)
+
+
+# Point-biserial correlation of every numeric column with churn, i.e. the
+# Pearson correlation with the 0/1 churn flag, read from the co-moments of
+# the running statistics (see running_stats.py) without touching the rows
+def numeric_importance(stats, columns=IMPORTANCE_NUMERIC):
+    corr = stats.correlations().loc[columns, 'churn_flag'].to_numpy()
+    return pd.DataFrame({'Feature': columns, 'Correlation': corr, '|Correlation|': np.abs(corr)}) \
+        .sort_values('|Correlation|', ascending=False, ignore_index=True)
@@ -5,6 +5,24 @@ import plotly.express as px
 import plotly.graph_objects as go
 from PIL import Image
 import os
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from aggregation import aggregate_frame, stream_aggregates
+from data_loader import (DATA_PATH, INGEST_MODE, SERVICE_COLUMNS, clean_churn_data, compact_churn_data,
+                         dataset_version, load_churn_data, memory_report)
+from bitmap_index import BitmapIndex
+from charts import churn_split_figure, distribution_figure, distribution_summary, pie_figure
+from caching import FIGURE_CACHE_BYTES, FILTER_CACHE_BYTES, LRUCache, filter_key
+from delta_ingest import IncrementalDataset
+from downsampling import downsample_points
+from churn_model import ModelStore, file_chunks, frame_chunks
+from importance import categorical_importance, numeric_importance
+from memory_accounting import (MEMORY_DEBUG, SNAPSHOTS, accounting_report, budget_warning, record_session,
+                               track)
+from profiling import HISTOGRAMS, PROFILER_PANEL, finish_trace, span, start_trace
+from shared_dataset import attach_dataset, snapshot_version
+from scoring import churn_probabilities, risk_categories, risk_distribution
+from synthetic_data import generate_churn_data
 
 # Set page configuration
 st.set_page_config(
@@ -432,49 +450,144 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Function to load data
-@st.cache_data
 def load_data():
     try:
-        df = pd.read_csv("C:/Users/asus//Downloads/churn_dataset.csv")
+        return load_churn_data()
     except FileNotFoundError:
         st.warning("Data file not found. Using sample data for demonstration.")
-        # Create sample data
-        np.random.seed(42)
-        n_samples = 7043
-        
-        # Generate sample data
-        data = {
-            'gender': np.random.choice(['Male', 'Female'], n_samples),
-            'SeniorCitizen': np.random.choice([0, 1], n_samples, p=[0.8, 0.2]),
-            'Partner': np.random.choice(['Yes', 'No'], n_samples, p=[0.5, 0.5]),
-            'Dependents': np.random.choice(['Yes', 'No'], n_samples, p=[0.3, 0.7]),
-            'tenure': np.random.randint(1, 73, n_samples),
-            'PhoneService': np.random.choice(['Yes', 'No'], n_samples, p=[0.9, 0.1]),
-            'MultipleLines': np.random.choice(['Yes', 'No', 'No phone service'], n_samples, p=[0.4, 0.4, 0.2]),
-            'InternetService': np.random.choice(['DSL', 'Fiber optic', 'No'], n_samples, p=[0.4, 0.3, 0.3]),
-            'OnlineSecurity': np.random.choice(['Yes', 'No', 'No internet service'], n_samples, p=[0.3, 0.4, 0.3]),
-            'OnlineBackup': np.random.choice(['Yes', 'No', 'No internet service'], n_samples, p=[0.3, 0.4, 0.3]),
-            'DeviceProtection': np.random.choice(['Yes', 'No', 'No internet service'], n_samples, p=[0.3, 0.4, 0.3]),
-            'TechSupport': np.random.choice(['Yes', 'No', 'No internet service'], n_samples, p=[0.3, 0.4, 0.3]),
-            'StreamingTV': np.random.choice(['Yes', 'No', 'No internet service'], n_samples, p=[0.3, 0.4, 0.3]),
-            'StreamingMovies': np.random.choice(['Yes', 'No', 'No internet service'], n_samples, p=[0.3, 0.4, 0.3]),
-            'Contract': np.random.choice(['Month-to-month', 'One year', 'Two year'], n_samples, p=[0.5, 0.3, 0.2]),
-            'PaperlessBilling': np.random.choice(['Yes', 'No'], n_samples, p=[0.6, 0.4]),
-            'PaymentMethod': np.random.choice(['Electronic check', 'Mailed check', 'Bank transfer (automatic)', 'Credit card (automatic)'], n_samples, p=[0.3, 0.2, 0.25, 0.25]),
-            'MonthlyCharges': np.random.uniform(18, 120, n_samples),
-            'TotalCharges': np.random.uniform(18, 8000, n_samples),
-            'Churn': np.random.choice(['Yes', 'No'], n_samples, p=[0.265, 0.735])
-        }
-        
-        df = pd.DataFrame(data)
-    
-    # Convert TotalCharges to numeric
-    df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce')
-    # Fill missing values
-    df['TotalCharges'] = df['TotalCharges'].fillna(df['MonthlyCharges'])
-    # Convert SeniorCitizen to categorical
-    df['SeniorCitizen'] = df['SeniorCitizen'].map({0: 'No', 1: 'Yes'})
-    return df
+        # Synthetic customers with the same shape and churn drivers as the original extract
+        return compact_churn_data(clean_churn_data(generate_churn_data(7043, seed=42)))
+
+# Dataset plus the aggregate cuboids behind every page chart, built once per
+# dataset version and held once per server process. Every session shares it
+# without copies; pages get views of it and delta files are applied once.
+@st.cache_resource(max_entries=1)
+def load_incremental_dataset(version):
+    df = load_data()
+    return track("dataset", IncrementalDataset(df, aggregate_frame(df)))
+
+# Rows, aggregates and bitmap index mapped from the snapshot that one server
+# process publishes for all of them, so host memory does not grow with the
+# number of workers and a new worker attaches without loading anything
+@st.cache_resource(max_entries=1)
+def load_shared_dataset(version):
+    return track("dataset", attach_dataset(version))
+
+# Bitmap index over the categorical columns of the loaded rows
+@st.cache_resource(max_entries=1)
+def load_bitmap_index(_rows, version):
+    return track("bitmap index", BitmapIndex(_rows()))
+
+# Filtered subsets and their chart tables, shared by all sessions
+@st.cache_resource
+def load_filter_cache():
+    return track("filter cache", LRUCache(FILTER_CACHE_BYTES))
+
+# Finished Plotly figures, shared by all sessions
+@st.cache_resource
+def load_figure_cache():
+    return track("figure cache", LRUCache(FIGURE_CACHE_BYTES))
+
+# Draw a chart through the figure cache. key names the page, the chart and
+# the widget values the chart depends on; build runs only on a miss, so an
+# unchanged chart costs neither its aggregation nor its figure construction.
+# Cached figures are shared, build must return a finished figure.
+def show_figure(key, version, build):
+    # Widget values that are not plain names stay out of the span names
+    name = "/".join(k for k in key if isinstance(k, str))
+    with span("chart " + name):
+        with span("figure " + name):
+            fig = load_figure_cache().get_or_compute(key + (version,), build)
+        with span("plotly_chart " + name):
+            st.plotly_chart(fig, use_container_width=True)
+
+# Timing spans of this rerun and latency percentiles across all reruns
+def profiler_panel(trace):
+    with st.sidebar.expander("Profiler"):
+        st.metric("This rerun", f"{trace.seconds * 1000:.0f} ms")
+        spans = pd.DataFrame([{'Span': '\u2003' * depth + name, 'Start (ms)': start * 1000,
+                               'Time (ms)': seconds * 1000 if seconds is not None else np.nan}
+                              for name, depth, start, seconds in trace.spans])
+        st.dataframe(spans, hide_index=True, use_container_width=True)
+        st.caption("All reruns since the server started")
+        st.dataframe(pd.DataFrame(HISTOGRAMS.summary()), hide_index=True, use_container_width=True)
+
+# Deep sizes of the shared objects, cache entries and sessions, and
+# tracemalloc snapshots taken on demand
+def memory_debug_panel():
+    with st.sidebar.expander("Memory Debug"):
+        report = accounting_report()
+        col1, col2 = st.columns(2)
+        col1.metric("Process RSS", f"{report['rss_mb']:,.0f} MB")
+        col2.metric("Accounted", f"{report['accounted_mb']:,.0f} MB")
+        st.caption(f"Peak RSS {report['peak_rss_mb']:,.0f} MB")
+        for title, rows in [("Shared objects", report['objects']), ("Largest cache entries", report['cache_entries']),
+                            ("Sessions", report['sessions'])]:
+            st.caption(title)
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        col1, col2 = st.columns(2)
+        if col1.button("Take snapshot"):
+            SNAPSHOTS.take()
+        if col2.button("Stop tracing", disabled=not SNAPSHOTS.tracing):
+            SNAPSHOTS.stop()
+        if SNAPSHOTS.latest is not None:
+            st.caption("Top allocators in the latest snapshot")
+            st.dataframe(pd.DataFrame(SNAPSHOTS.top()), hide_index=True, use_container_width=True)
+        if SNAPSHOTS.previous is not None:
+            st.caption("Change since the previous snapshot")
+            st.dataframe(pd.DataFrame(SNAPSHOTS.diff()), hide_index=True, use_container_width=True)
+
+# Hit, miss and eviction counts of one cache in the sidebar
+def cache_stats(title, cache):
+    with st.sidebar.expander(title):
+        stats = cache.stats()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Hits", stats['hits'])
+        col2.metric("Misses", stats['misses'])
+        col3.metric("Evictions", stats['evictions'])
+        st.caption(f"{stats['entries']} entries, {stats['MB']:.1f} of {stats['budget MB']:.0f} MB, "
+                   f"hit rate {stats['hit rate (%)']:.0f}%")
+
+# Per-column memory usage of the frames holding the loaded rows
+@st.cache_data(max_entries=1)
+def load_memory_report(_frames, version):
+    return memory_report(*_frames)
+
+# Importance of every feature for churn, computed once per dataset version
+@st.cache_data(max_entries=1)
+def load_feature_importance(_aggregates, version):
+    return categorical_importance(_aggregates), numeric_importance(_aggregates.stats)
+
+# Aggregates and a bounded row sample read chunk by chunk from the source
+# file. Without one (version None) they cover the synthetic customers of
+# load_data(), which all fit in the sample.
+@st.cache_resource(max_entries=1)
+def load_stream_aggregates(version):
+    if version is None:
+        df = load_data()
+        aggregates = aggregate_frame(df)
+        aggregates.sample = df
+        return track("stream aggregates", aggregates)
+    return track("stream aggregates", stream_aggregates())
+
+# Fitted churn models on disk, shared by all sessions
+@st.cache_resource
+def load_model_store():
+    return track("model store", ModelStore())
+
+# Logistic churn model of the loaded data, streamed from the source file in
+# streaming mode. Served from the artifact cache; a changed dataset is
+# fitted in the background while the previous model keeps serving.
+def load_churn_model(rows, version):
+    if INGEST_MODE == "stream" and version is not None:
+        return load_model_store().get(version, file_chunks(DATA_PATH))
+    # The rows are only taken when a fit reads them
+    chunks = lambda: frame_chunks(rows())()
+    if version is None:
+        # Synthetic customers of stream mode, the sample holds all of them
+        return load_model_store().get(version, chunks)
+    # version is (file fingerprint, deltas applied or snapshot): deltas warm-start the model of the same file
+    return load_model_store().get(version, chunks, source=version[0])
 
 # Main function to run the app
 def main():
@@ -502,7 +615,39 @@ def main():
         # These filters will be applied across all pages
         
     # Load data
-    df = load_data()
+    start_trace(page)
+    with span("load data"):
+        version = dataset_version()
+        index = None
+        if INGEST_MODE == "stream":
+            aggregates = load_stream_aggregates(version)
+            rows, frames = (lambda: aggregates.sample.copy(deep=False)), [aggregates.sample]
+            st.sidebar.caption(f"Streaming mode: totals cover all {aggregates.rows:,} customers, "
+                               f"charts of individual customers use a random sample of "
+                               f"{len(aggregates.sample):,}.")
+        elif INGEST_MODE == "shared" and version is not None:
+            # Delta files are applied by the publisher of the next snapshot
+            dataset = load_shared_dataset(snapshot_version(version))
+            rows, frames, aggregates, index = dataset.view, [dataset.frame], dataset.aggregates, dataset.index
+            if dataset.applied:
+                st.sidebar.caption(f"{len(dataset.applied)} delta file(s) applied, latest: {dataset.applied[-1]}")
+            # (file fingerprint, snapshot), like the (file fingerprint, deltas) of memory mode
+            version = (version, dataset.version)
+        else:
+            dataset = load_incremental_dataset(version)
+            with span("apply deltas"):
+                dataset.refresh()
+            # Pages that chart individual customers call rows(), which after a
+            # delta concatenates the rows once; the others never touch them
+            rows, frames, aggregates = dataset.view, dataset.frames(), dataset.aggregates
+            if dataset.applied:
+                st.sidebar.caption(f"{len(dataset.applied)} delta file(s) applied, latest: {dataset.applied[-1]}")
+            version = (version, len(dataset.applied))
+    
+    with st.sidebar.expander("Memory Usage"), span("memory report"):
+        report = load_memory_report(frames, version)
+        st.metric("Dataset in memory", f"{report['MB'].sum():.1f} MB")
+        st.dataframe(report, hide_index=True, use_container_width=True)
     
     # Header
     st.markdown("""
@@ -514,32 +659,51 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    # Executive Summary Page
-    if page == "Executive Summary":
-        executive_summary(df)
-    
-    # Customer Demographics Page
-    elif page == "Customer Demographics":
-        customer_demographics(df)
-    
-    # Service Analysis Page
-    elif page == "Service Analysis":
-        service_analysis(df)
-    
-    # Contract & Charges Page
-    elif page == "Contract & Charges":
-        contract_charges_analysis(df)
-    
-    # Churn Prediction Page
-    elif page == "Churn Prediction":
-        churn_prediction(df)
-    
-    # Recommendations Page
-    elif page == "Recommendations":
-        recommendations()
+    with span("page " + page):
+        # Executive Summary Page
+        if page == "Executive Summary":
+            executive_summary(aggregates, version)
+    
+        # Customer Demographics Page
+        elif page == "Customer Demographics":
+            customer_demographics(aggregates, version)
+    
+        # Service Analysis Page
+        elif page == "Service Analysis":
+            service_analysis(aggregates, version)
+    
+        # Contract & Charges Page
+        elif page == "Contract & Charges":
+            if index is None:
+                index = load_bitmap_index(rows, version)
+            contract_charges_analysis(rows, aggregates, index, version)
+    
+        # Churn Prediction Page
+        elif page == "Churn Prediction":
+            churn_prediction(rows, aggregates, version)
+    
+        # Recommendations Page
+        elif page == "Recommendations":
+            recommendations()
+    
+    cache_stats("Filter Cache", load_filter_cache())
+    cache_stats("Figure Cache", load_figure_cache())
+    
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        record_session(ctx.session_id, st.session_state.to_dict())
+    warning = budget_warning()
+    if warning:
+        st.sidebar.warning(warning)
+    if MEMORY_DEBUG:
+        memory_debug_panel()
+    
+    trace = finish_trace()
+    if PROFILER_PANEL:
+        profiler_panel(trace)
 
 # Executive Summary Page
-def executive_summary(df):
+def executive_summary(aggregates, version):
     st.markdown("<h2 class='sub-header'>📈 Executive Summary</h2>", unsafe_allow_html=True)
     
     # Key metrics with enhanced styling
@@ -551,10 +715,10 @@ def executive_summary(df):
             <div class="metric-value">{:,}</div>
             <div class="metric-label">Total Customers</div>
         </div>
-        """.format(len(df)), unsafe_allow_html=True)
+        """.format(aggregates.rows), unsafe_allow_html=True)
     
     with col2:
-        churn_rate = df['Churn'].value_counts(normalize=True).loc['Yes'] * 100
+        churn_rate = aggregates.churn_rate()
         st.markdown("""
         <div class="metric-card">
             <div class="metric-value">{:.2f}%</div>
@@ -563,7 +727,7 @@ def executive_summary(df):
         """.format(churn_rate), unsafe_allow_html=True)
     
     with col3:
-        avg_tenure = df['tenure'].mean()
+        avg_tenure = aggregates.mean('tenure')
         st.markdown("""
         <div class="metric-card">
             <div class="metric-value">{:.1f}</div>
@@ -572,7 +736,7 @@ def executive_summary(df):
         """.format(avg_tenure), unsafe_allow_html=True)
     
     with col4:
-        avg_monthly = df['MonthlyCharges'].mean()
+        avg_monthly = aggregates.mean('MonthlyCharges')
         st.markdown("""
         <div class="metric-card">
             <div class="metric-value">${:.2f}</div>
@@ -597,17 +761,17 @@ def executive_summary(df):
     
     with col1:
         # Churn distribution chart
-        churn_counts = df['Churn'].value_counts()
-        fig = px.pie(values=churn_counts.values, names=churn_counts.index, 
-                    title="📊 Overall Churn Distribution",
-                    color_discrete_sequence=['#667eea', '#fa709a'])
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        fig.update_layout(
-            title_font_size=20,
-            title_font_color='#667eea',
-            font=dict(size=14)
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        def churn_distribution():
+            churn_counts = aggregates.churn_counts()
+            fig = pie_figure(churn_counts.rename_axis('Churn').reset_index(), 'Churn',
+                             "📊 Overall Churn Distribution", ['#667eea', '#fa709a'], values='count')
+            fig.update_layout(
+                title_font_size=20,
+                title_font_color='#667eea',
+                font=dict(size=14)
+            )
+            return fig
+        show_figure(('summary', 'churn'), version, churn_distribution)
         
         st.markdown("""
         <div class='insight-text'>
@@ -618,21 +782,22 @@ def executive_summary(df):
     
     with col2:
         # Contract analysis chart
-        contract_churn = df.groupby('Contract')['Churn'].apply(
-            lambda x: (x == 'Yes').mean() * 100).reset_index()
-        contract_churn.columns = ['Contract', 'Churn Rate (%)']
-        
-        fig = px.bar(contract_churn, x='Contract', y='Churn Rate (%)',
-                    title="📈 Churn by Contract Type",
-                    color='Churn Rate (%)', color_continuous_scale='Reds')
-        fig.update_layout(
-            title_font_size=20,
-            title_font_color='#667eea',
-            font=dict(size=14),
-            xaxis_title="Contract Type",
-            yaxis_title="Churn Rate (%)"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        def contract_chart():
+            contract_churn = aggregates.churn_rates(['Contract'])
+            contract_churn.columns = ['Contract', 'Churn Rate (%)']
+            
+            fig = px.bar(contract_churn, x='Contract', y='Churn Rate (%)',
+                        title="📈 Churn by Contract Type",
+                        color='Churn Rate (%)', color_continuous_scale='Reds')
+            fig.update_layout(
+                title_font_size=20,
+                title_font_color='#667eea',
+                font=dict(size=14),
+                xaxis_title="Contract Type",
+                yaxis_title="Churn Rate (%)"
+            )
+            return fig
+        show_figure(('summary', 'contract'), version, contract_chart)
         
         st.markdown("""
         <div class='insight-text'>
@@ -649,17 +814,16 @@ def executive_summary(df):
     
     with col1:
         # Tenure vs churn rate
-        df['tenure_group'] = pd.cut(df['tenure'], bins=[0, 12, 24, 36, 48, 72], 
-                                   labels=['0-12', '13-24', '25-36', '37-48', '49+'])
-        tenure_churn = df.groupby('tenure_group')['Churn'].apply(
-            lambda x: (x == 'Yes').mean() * 100).reset_index()
-        tenure_churn.columns = ['Tenure Group', 'Churn Rate (%)']
-        
-        fig = px.line(tenure_churn, x='Tenure Group', y='Churn Rate (%)',
-                     title="Churn Rate by Tenure",
-                     markers=True)
-        fig.update_layout(xaxis_title='Tenure (months)', yaxis_title='Churn Rate (%)')
-        st.plotly_chart(fig, use_container_width=True)
+        def tenure_chart():
+            tenure_churn = aggregates.churn_rates(['tenure_group'])
+            tenure_churn.columns = ['Tenure Group', 'Churn Rate (%)']
+            
+            fig = px.line(tenure_churn, x='Tenure Group', y='Churn Rate (%)',
+                         title="Churn Rate by Tenure",
+                         markers=True)
+            fig.update_layout(xaxis_title='Tenure (months)', yaxis_title='Churn Rate (%)')
+            return fig
+        show_figure(('summary', 'tenure'), version, tenure_chart)
         
         st.markdown("""
         <div class='insight-text'>
@@ -670,16 +834,14 @@ def executive_summary(df):
     
     with col2:
         # Customer segment analysis
-        df['segment'] = pd.cut(df['MonthlyCharges'], bins=[0, 40, 80, 120], 
-                              labels=['Low', 'Medium', 'High'])
-        segment_churn = df.groupby(['segment', 'Contract'])['Churn'].apply(
-            lambda x: (x == 'Yes').mean() * 100).reset_index()
-        segment_churn.columns = ['Monthly Charges', 'Contract', 'Churn Rate (%)']
-        
-        fig = px.scatter(segment_churn, x='Monthly Charges', y='Churn Rate (%)', 
-                        color='Contract', size='Churn Rate (%)',
-                        title="Churn Rate by Customer Segment")
-        st.plotly_chart(fig, use_container_width=True)
+        def segment_chart():
+            segment_churn = aggregates.churn_rates(['charges_group', 'Contract'])
+            segment_churn.columns = ['Monthly Charges', 'Contract', 'Churn Rate (%)']
+            
+            return px.scatter(segment_churn, x='Monthly Charges', y='Churn Rate (%)', 
+                              color='Contract', size='Churn Rate (%)',
+                              title="Churn Rate by Customer Segment")
+        show_figure(('summary', 'segments'), version, segment_chart)
         
         st.markdown("""
         <div class='insight-text'>
@@ -688,19 +850,45 @@ def executive_summary(df):
         </div>
         """, unsafe_allow_html=True)
 
+# Filter-dependent tables of the demographics page
+def demographic_tables(aggregates, filters):
+    columns = ['gender', 'SeniorCitizen', 'Partner', 'Dependents']
+    
+    # Calculate churn rate by demographic combination
+    demo_churn = aggregates.churn_rates(columns, filters)
+    
+    # Label each combination
+    demo_churn['demographic_group'] = demo_churn['gender'].astype(str) + ', ' + \
+                                      demo_churn['SeniorCitizen'].astype(str) + ' senior, ' + \
+                                      demo_churn['Partner'].astype(str) + ' partner, ' + \
+                                      demo_churn['Dependents'].astype(str) + ' dependents'
+    demo_churn = demo_churn[['demographic_group', 'Churn Rate (%)']]
+    demo_churn.columns = ['Demographic Group', 'Churn Rate (%)']
+    
+    return {
+        'counts': {col: aggregates.table([col], filters) for col in columns},
+        'splits': {col: aggregates.churn_split([col], filters) for col in columns},
+        'combinations': demo_churn.sort_values('Churn Rate (%)', ascending=False),
+    }
+
 # Customer Demographics Page
-def customer_demographics(df):
+def customer_demographics(aggregates, version):
     st.markdown("<h2 class='sub-header'>Customer Demographics Analysis</h2>", unsafe_allow_html=True)
     
     # Filters for this page
     col1, col2 = st.columns(2)
     with col1:
-        gender_filter = st.multiselect("Filter by Gender", options=df['gender'].unique(), default=df['gender'].unique())
+        gender_options = aggregates.levels('gender')
+        gender_filter = st.multiselect("Filter by Gender", options=gender_options, default=gender_options)
     with col2:
-        senior_filter = st.multiselect("Filter by Senior Citizen", options=df['SeniorCitizen'].unique(), default=df['SeniorCitizen'].unique())
+        senior_options = aggregates.levels('SeniorCitizen')
+        senior_filter = st.multiselect("Filter by Senior Citizen", options=senior_options, default=senior_options)
     
     # Apply filters
-    filtered_df = df[(df['gender'].isin(gender_filter)) & (df['SeniorCitizen'].isin(senior_filter))]
+    filters = {'gender': gender_filter, 'SeniorCitizen': senior_filter}
+    key = filter_key(filters)
+    tables = load_filter_cache().get_or_compute(('demographics', version, key),
+                                                lambda: demographic_tables(aggregates, filters))
     
     # Demographics overview
     st.markdown("<h3>Demographics Overview</h3>", unsafe_allow_html=True)
@@ -709,29 +897,25 @@ def customer_demographics(df):
     
     with col1:
         # Gender distribution
-        fig = px.pie(filtered_df, names='gender', title='Gender Distribution',
-                    color_discrete_sequence=px.colors.qualitative.Set2)
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('demographics', 'pie', 'gender', key), version,
+                    lambda: pie_figure(tables['counts']['gender'], 'gender', 'Gender Distribution',
+                                       px.colors.qualitative.Set2))
         
         # Partner distribution
-        fig = px.pie(filtered_df, names='Partner', title='Partner Status Distribution',
-                    color_discrete_sequence=px.colors.qualitative.Pastel)
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('demographics', 'pie', 'Partner', key), version,
+                    lambda: pie_figure(tables['counts']['Partner'], 'Partner', 'Partner Status Distribution',
+                                       px.colors.qualitative.Pastel))
     
     with col2:
         # Senior Citizen distribution
-        fig = px.pie(filtered_df, names='SeniorCitizen', title='Senior Citizen Distribution',
-                    color_discrete_sequence=px.colors.qualitative.Bold)
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('demographics', 'pie', 'SeniorCitizen', key), version,
+                    lambda: pie_figure(tables['counts']['SeniorCitizen'], 'SeniorCitizen', 'Senior Citizen Distribution',
+                                       px.colors.qualitative.Bold))
         
         # Dependents distribution
-        fig = px.pie(filtered_df, names='Dependents', title='Dependents Status Distribution',
-                    color_discrete_sequence=px.colors.qualitative.Pastel1)
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('demographics', 'pie', 'Dependents', key), version,
+                    lambda: pie_figure(tables['counts']['Dependents'], 'Dependents', 'Dependents Status Distribution',
+                                       px.colors.qualitative.Pastel1))
     
     # Churn analysis by demographics
     st.markdown("<h3 class='sub-header'>Churn Analysis by Demographics</h3>", unsafe_allow_html=True)
@@ -740,53 +924,38 @@ def customer_demographics(df):
     
     with col1:
         # Gender vs Churn
-        fig = px.histogram(filtered_df, x='gender', color='Churn', barmode='group',
-                          title='Churn Distribution by Gender',
-                          color_discrete_sequence=['#3498db', '#e74c3c'])
-        fig.update_layout(xaxis_title='Gender', yaxis_title='Count')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('demographics', 'split', 'gender', key), version,
+                    lambda: churn_split_figure(tables['splits']['gender'], 'gender',
+                                               'Churn Distribution by Gender', 'Gender'))
         
         # Partner vs Churn
-        fig = px.histogram(filtered_df, x='Partner', color='Churn', barmode='group',
-                          title='Churn Distribution by Partner Status',
-                          color_discrete_sequence=['#3498db', '#e74c3c'])
-        fig.update_layout(xaxis_title='Partner Status', yaxis_title='Count')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('demographics', 'split', 'Partner', key), version,
+                    lambda: churn_split_figure(tables['splits']['Partner'], 'Partner',
+                                               'Churn Distribution by Partner Status', 'Partner Status'))
     
     with col2:
         # Senior Citizen vs Churn
-        fig = px.histogram(filtered_df, x='SeniorCitizen', color='Churn', barmode='group',
-                          title='Churn Distribution by Senior Citizen Status',
-                          color_discrete_sequence=['#3498db', '#e74c3c'])
-        fig.update_layout(xaxis_title='Senior Citizen', yaxis_title='Count')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('demographics', 'split', 'SeniorCitizen', key), version,
+                    lambda: churn_split_figure(tables['splits']['SeniorCitizen'], 'SeniorCitizen',
+                                               'Churn Distribution by Senior Citizen Status', 'Senior Citizen'))
         
         # Dependents vs Churn
-        fig = px.histogram(filtered_df, x='Dependents', color='Churn', barmode='group',
-                          title='Churn Distribution by Dependents Status',
-                          color_discrete_sequence=['#3498db', '#e74c3c'])
-        fig.update_layout(xaxis_title='Dependents', yaxis_title='Count')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('demographics', 'split', 'Dependents', key), version,
+                    lambda: churn_split_figure(tables['splits']['Dependents'], 'Dependents',
+                                               'Churn Distribution by Dependents Status', 'Dependents'))
     
     # Churn rates by demographic combinations
     st.markdown("<h3 class='sub-header'>Churn Rates by Demographic Combinations</h3>", unsafe_allow_html=True)
     
-    # Create demographic combinations
-    filtered_df['demographic_group'] = filtered_df['gender'] + ', ' + filtered_df['SeniorCitizen'] + ' senior, ' + \
-                                      filtered_df['Partner'] + ' partner, ' + filtered_df['Dependents'] + ' dependents'
-    
-    # Calculate churn rate by demographic group
-    demo_churn = filtered_df.groupby('demographic_group')['Churn'].apply(
-        lambda x: (x == 'Yes').mean() * 100).reset_index()
-    demo_churn.columns = ['Demographic Group', 'Churn Rate (%)']
-    demo_churn = demo_churn.sort_values('Churn Rate (%)', ascending=False)
-    
     # Plot top 10 demographic groups by churn rate
-    fig = px.bar(demo_churn.head(10), x='Churn Rate (%)', y='Demographic Group', 
-                orientation='h', title='Top 10 Demographic Groups by Churn Rate',
-                color='Churn Rate (%)', color_continuous_scale='Reds')
-    fig.update_layout(yaxis_title='', xaxis_title='Churn Rate (%)')
-    st.plotly_chart(fig, use_container_width=True)
+    def combinations_chart():
+        demo_churn = tables['combinations']
+        fig = px.bar(demo_churn.head(10), x='Churn Rate (%)', y='Demographic Group',
+                    orientation='h', title='Top 10 Demographic Groups by Churn Rate',
+                    color='Churn Rate (%)', color_continuous_scale='Reds')
+        fig.update_layout(yaxis_title='', xaxis_title='Churn Rate (%)')
+        return fig
+    show_figure(('demographics', 'combinations', key), version, combinations_chart)
     
     # Insights
     st.markdown("""
@@ -802,12 +971,11 @@ def customer_demographics(df):
     """, unsafe_allow_html=True)
 
 # Service Analysis Page
-def service_analysis(df):
+def service_analysis(aggregates, version):
     st.markdown("<h2 class='sub-header'>Service Analysis</h2>", unsafe_allow_html=True)
     
     # Service selection filter
-    service_options = ['PhoneService', 'MultipleLines', 'InternetService', 'OnlineSecurity', 
-                      'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies']
+    service_options = SERVICE_COLUMNS
     selected_services = st.multiselect("Select Services to Analyze", options=service_options, 
                                       default=['InternetService', 'OnlineSecurity', 'TechSupport'])
     
@@ -820,30 +988,29 @@ def service_analysis(df):
     # Display distribution for each selected service
     for i, service in enumerate(selected_services):
         with cols[i % len(cols)]:
-            fig = px.pie(df, names=service, title=f'{service} Distribution',
-                        color_discrete_sequence=px.colors.qualitative.Bold)
-            fig.update_traces(textposition='inside', textinfo='percent+label')
-            st.plotly_chart(fig, use_container_width=True)
+            show_figure(('services', 'pie', service), version,
+                        lambda: pie_figure(aggregates.table([service]), service, f'{service} Distribution',
+                                           px.colors.qualitative.Bold))
     
     # Service impact on churn
     st.markdown("<h3 class='sub-header'>Service Impact on Churn</h3>", unsafe_allow_html=True)
     
     # Create service impact chart
-    service_impact_data = []
-    for service in service_options:
-        service_churn = df.groupby(service)['Churn'].apply(
-            lambda x: (x == 'Yes').mean() * 100).reset_index()
-        service_churn.columns = [service, 'Churn Rate (%)']
-        service_impact_data.append(service_churn)
-    
-    # Combine all service data
-    all_service_data = pd.concat(service_impact_data, ignore_index=True)
-    
-    # Create heatmap-style visualization
-    fig = px.bar(all_service_data, x=all_service_data.columns[0], y='Churn Rate (%)',
-                title="Impact of Services on Churn Rate",
-                color='Churn Rate (%)', color_continuous_scale='Blues')
-    st.plotly_chart(fig, use_container_width=True)
+    def service_impact_chart():
+        service_impact_data = []
+        for service in service_options:
+            service_churn = aggregates.churn_rates([service])
+            service_churn.columns = [service, 'Churn Rate (%)']
+            service_impact_data.append(service_churn)
+        
+        # Combine all service data
+        all_service_data = pd.concat(service_impact_data, ignore_index=True)
+        
+        # Create heatmap-style visualization
+        return px.bar(all_service_data, x=all_service_data.columns[0], y='Churn Rate (%)',
+                      title="Impact of Services on Churn Rate",
+                      color='Churn Rate (%)', color_continuous_scale='Blues')
+    show_figure(('services', 'impact'), version, service_impact_chart)
     
     # Interactive service churn analysis
     st.markdown("<h3>Interactive Service Churn Analysis</h3>", unsafe_allow_html=True)
@@ -851,16 +1018,16 @@ def service_analysis(df):
     # Select service for detailed analysis
     selected_service = st.selectbox("Select a service for detailed analysis", options=service_options)
     
-    # Calculate churn rate by selected service
-    service_churn = df.groupby(selected_service)['Churn'].apply(
-        lambda x: (x == 'Yes').mean() * 100).reset_index()
-    service_churn.columns = [selected_service, 'Churn Rate (%)']
-    
-    # Plot
-    fig = px.bar(service_churn, x=selected_service, y='Churn Rate (%)', 
-                title=f'Churn Rate by {selected_service}',
-                color='Churn Rate (%)', color_continuous_scale='Blues')
-    st.plotly_chart(fig, use_container_width=True)
+    def selected_service_chart():
+        # Calculate churn rate by selected service
+        service_churn = aggregates.churn_rates([selected_service])
+        service_churn.columns = [selected_service, 'Churn Rate (%)']
+        
+        # Plot
+        return px.bar(service_churn, x=selected_service, y='Churn Rate (%)', 
+                      title=f'Churn Rate by {selected_service}',
+                      color='Churn Rate (%)', color_continuous_scale='Blues')
+    show_figure(('services', 'detail', selected_service), version, selected_service_chart)
     
     # Service combinations analysis
     st.markdown("<h3 class='sub-header'>Service Combinations Analysis</h3>", unsafe_allow_html=True)
@@ -873,20 +1040,21 @@ def service_analysis(df):
         remaining_options = [s for s in service_options if s != service1]
         service2 = st.selectbox("Select second service", options=remaining_options, index=2)  # TechSupport
     
-    # Calculate churn rate by service combination
-    combo_churn = df.groupby([service1, service2])['Churn'].apply(
-        lambda x: (x == 'Yes').mean() * 100).reset_index()
-    combo_churn.columns = [service1, service2, 'Churn Rate (%)']
-    
-    # Create pivot table for heatmap
-    pivot_combo = combo_churn.pivot(index=service1, columns=service2, values='Churn Rate (%)')
-    
-    # Plot heatmap
-    fig = px.imshow(pivot_combo, text_auto=True, aspect="auto",
-                   title=f'Churn Rate (%) by {service1} and {service2} Combination',
-                   color_continuous_scale='YlOrRd')
-    fig.update_layout(xaxis_title=service2, yaxis_title=service1)
-    st.plotly_chart(fig, use_container_width=True)
+    def combination_chart():
+        # Calculate churn rate by service combination
+        combo_churn = aggregates.churn_rates([service1, service2])
+        combo_churn.columns = [service1, service2, 'Churn Rate (%)']
+        
+        # Create pivot table for heatmap
+        pivot_combo = combo_churn.pivot(index=service1, columns=service2, values='Churn Rate (%)')
+        
+        # Plot heatmap
+        fig = px.imshow(pivot_combo, text_auto=True, aspect="auto",
+                       title=f'Churn Rate (%) by {service1} and {service2} Combination',
+                       color_continuous_scale='YlOrRd')
+        fig.update_layout(xaxis_title=service2, yaxis_title=service1)
+        return fig
+    show_figure(('services', 'combination', service1, service2), version, combination_chart)
     
     # Insights
     st.markdown("""
@@ -901,21 +1069,43 @@ def service_analysis(df):
     </div>
     """, unsafe_allow_html=True)
 
+# Filter-dependent rows and tables of the contract page. The selection is
+# kept as a packed bitmap, None when every row matches, so an entry costs
+# n/8 bytes at most instead of a position per row.
+def contract_tables(aggregates, index, filters):
+    bits = index.select(filters)
+    return {
+        'bits': bits,
+        'customers': index.count(bits),
+        'Contract': aggregates.table(['Contract'], filters),
+        'PaymentMethod': aggregates.table(['PaymentMethod'], filters),
+    }
+
 # Contract & Charges Analysis Page
-def contract_charges_analysis(df):
+def contract_charges_analysis(rows, aggregates, index, version):
     st.markdown("<h2 class='sub-header'>Contract & Charges Analysis</h2>", unsafe_allow_html=True)
     
     # Filters
     col1, col2 = st.columns(2)
     with col1:
-        contract_filter = st.multiselect("Filter by Contract Type", options=df['Contract'].unique(), 
-                                        default=df['Contract'].unique())
+        contract_options = aggregates.levels('Contract')
+        contract_filter = st.multiselect("Filter by Contract Type", options=contract_options, 
+                                        default=contract_options)
     with col2:
-        payment_filter = st.multiselect("Filter by Payment Method", options=df['PaymentMethod'].unique(), 
-                                       default=df['PaymentMethod'].unique())
+        payment_options = aggregates.levels('PaymentMethod')
+        payment_filter = st.multiselect("Filter by Payment Method", options=payment_options, 
+                                       default=payment_options)
     
     # Apply filters
-    filtered_df = df[(df['Contract'].isin(contract_filter)) & (df['PaymentMethod'].isin(payment_filter))]
+    filters = {'Contract': contract_filter, 'PaymentMethod': payment_filter}
+    key = filter_key(filters)
+    tables = load_filter_cache().get_or_compute(('contract', version, key),
+                                                lambda: contract_tables(aggregates, index, filters))
+    
+    # Rows of the selection, only taken when a chart has to be rebuilt
+    def filtered_rows():
+        df = rows()
+        return df if tables['bits'] is None else df.iloc[index.positions(tables['bits'])]
     
     # Contract and payment distribution
     st.markdown("<h3>Contract and Payment Distribution</h3>", unsafe_allow_html=True)
@@ -924,92 +1114,104 @@ def contract_charges_analysis(df):
     
     with col1:
         # Contract distribution
-        fig = px.pie(filtered_df, names='Contract', title='Contract Type Distribution',
-                    color_discrete_sequence=px.colors.qualitative.Set1)
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('contract', 'pie', 'Contract', key), version,
+                    lambda: pie_figure(tables['Contract'], 'Contract', 'Contract Type Distribution',
+                                       px.colors.qualitative.Set1))
     
     with col2:
         # Payment method distribution
-        fig = px.pie(filtered_df, names='PaymentMethod', title='Payment Method Distribution',
-                    color_discrete_sequence=px.colors.qualitative.Pastel)
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('contract', 'pie', 'PaymentMethod', key), version,
+                    lambda: pie_figure(tables['PaymentMethod'], 'PaymentMethod', 'Payment Method Distribution',
+                                       px.colors.qualitative.Pastel))
     
     # Contract impact on churn
     st.markdown("<h3 class='sub-header'>Contract Impact on Churn</h3>", unsafe_allow_html=True)
     
     # Create contract impact chart
-    contract_churn = df.groupby('Contract')['Churn'].apply(
-        lambda x: (x == 'Yes').mean() * 100).reset_index()
-    contract_churn.columns = ['Contract', 'Churn Rate (%)']
-    
-    fig = px.bar(contract_churn, x='Contract', y='Churn Rate (%)',
-                title="Contract Type Impact on Churn",
-                color='Churn Rate (%)', color_continuous_scale='Reds')
-    st.plotly_chart(fig, use_container_width=True)
+    def contract_chart():
+        contract_churn = aggregates.churn_rates(['Contract'])
+        contract_churn.columns = ['Contract', 'Churn Rate (%)']
+        
+        return px.bar(contract_churn, x='Contract', y='Churn Rate (%)',
+                      title="Contract Type Impact on Churn",
+                      color='Churn Rate (%)', color_continuous_scale='Reds')
+    show_figure(('contract', 'contract'), version, contract_chart)
     
     # Payment method impact on churn
     st.markdown("<h3 class='sub-header'>Payment Method Impact on Churn</h3>", unsafe_allow_html=True)
     
     # Create payment method impact chart
-    payment_churn = df.groupby('PaymentMethod')['Churn'].apply(
-        lambda x: (x == 'Yes').mean() * 100).reset_index()
-    payment_churn.columns = ['Payment Method', 'Churn Rate (%)']
-    
-    fig = px.bar(payment_churn, x='Payment Method', y='Churn Rate (%)',
-                title="Payment Method Impact on Churn",
-                color='Churn Rate (%)', color_continuous_scale='Blues')
-    st.plotly_chart(fig, use_container_width=True)
+    def payment_chart():
+        payment_churn = aggregates.churn_rates(['PaymentMethod'])
+        payment_churn.columns = ['Payment Method', 'Churn Rate (%)']
+        
+        return px.bar(payment_churn, x='Payment Method', y='Churn Rate (%)',
+                      title="Payment Method Impact on Churn",
+                      color='Churn Rate (%)', color_continuous_scale='Blues')
+    show_figure(('contract', 'payment'), version, payment_chart)
     
     # Charges analysis
     st.markdown("<h3 class='sub-header'>Charges Analysis</h3>", unsafe_allow_html=True)
     
+    # Bin counts are computed here, not in the browser; the box plots read
+    # their quartiles from the quantile sketches instead of sorting the rows
+    def charges_summary(column):
+        box = {churn: aggregates.sketches.box_stats(column, filters, churn) for churn in ['No', 'Yes']}
+        return distribution_summary(filtered_rows(), column, box=box)
+    
+    def charges_chart(column, title, xaxis_title):
+        summary = load_filter_cache().get_or_compute(('contract-charges', version, key, column),
+                                                     lambda: charges_summary(column))
+        return distribution_figure(summary, title, xaxis_title)
+    
     col1, col2 = st.columns(2)
     
     with col1:
         # Monthly charges distribution
-        fig = px.histogram(filtered_df, x='MonthlyCharges', color='Churn',
-                          title='Monthly Charges Distribution by Churn Status',
-                          color_discrete_sequence=['#3498db', '#e74c3c'],
-                          marginal='box')
-        fig.update_layout(xaxis_title='Monthly Charges ($)', yaxis_title='Count')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('contract', 'charges', 'MonthlyCharges', key), version,
+                    lambda: charges_chart('MonthlyCharges', 'Monthly Charges Distribution by Churn Status',
+                                          'Monthly Charges ($)'))
     
     with col2:
         # Total charges distribution
-        fig = px.histogram(filtered_df, x='TotalCharges', color='Churn',
-                          title='Total Charges Distribution by Churn Status',
-                          color_discrete_sequence=['#3498db', '#e74c3c'],
-                          marginal='box')
-        fig.update_layout(xaxis_title='Total Charges ($)', yaxis_title='Count')
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure(('contract', 'charges', 'TotalCharges', key), version,
+                    lambda: charges_chart('TotalCharges', 'Total Charges Distribution by Churn Status',
+                                          'Total Charges ($)'))
     
     # Contract and charges combined analysis
     st.markdown("<h3 class='sub-header'>Contract and Charges Combined Analysis</h3>", unsafe_allow_html=True)
     
     # Create contract and charges combined chart
-    df['charges_group'] = pd.cut(df['MonthlyCharges'], bins=[0, 40, 80, 120], 
-                                labels=['Low', 'Medium', 'High'])
-    contract_charges_churn = df.groupby(['Contract', 'charges_group'])['Churn'].apply(
-        lambda x: (x == 'Yes').mean() * 100).reset_index()
-    contract_charges_churn.columns = ['Contract', 'Monthly Charges', 'Churn Rate (%)']
-    
-    fig = px.scatter(contract_charges_churn, x='Contract', y='Churn Rate (%)',
-                    color='Monthly Charges', size='Churn Rate (%)',
-                    title="Churn Rate by Contract Type and Monthly Charges")
-    st.plotly_chart(fig, use_container_width=True)
+    def contract_charges_chart():
+        contract_charges_churn = aggregates.churn_rates(['Contract', 'charges_group'])
+        contract_charges_churn.columns = ['Contract', 'Monthly Charges', 'Churn Rate (%)']
+        
+        return px.scatter(contract_charges_churn, x='Contract', y='Churn Rate (%)',
+                          color='Monthly Charges', size='Churn Rate (%)',
+                          title="Churn Rate by Contract Type and Monthly Charges")
+    show_figure(('contract', 'contract-charges'), version, contract_charges_chart)
     
     # Interactive scatter plot
     st.markdown("<h3>Interactive Charges vs. Tenure Analysis</h3>", unsafe_allow_html=True)
     
-    fig = px.scatter(filtered_df, x='tenure', y='MonthlyCharges', color='Churn', 
-                    size='TotalCharges', hover_name='Contract',
-                    hover_data=['PaymentMethod', 'InternetService'],
-                    title='Monthly Charges vs. Tenure by Churn Status',
-                    color_discrete_sequence=['#3498db', '#e74c3c'])
-    fig.update_layout(xaxis_title='Tenure (months)', yaxis_title='Monthly Charges ($)')
-    st.plotly_chart(fig, use_container_width=True)
+    # Large selections are thinned on the server before they reach the browser
+    with span("downsample contract/scatter"):
+        scatter_df = load_filter_cache().get_or_compute(
+            ('contract-scatter', version, key),
+            lambda: downsample_points(filtered_rows(), 'tenure', 'MonthlyCharges'))
+    if len(scatter_df) < tables['customers']:
+        st.caption(f"Showing a density-preserving sample of {len(scatter_df):,} "
+                   f"of {tables['customers']:,} customers.")
+    
+    def scatter_chart():
+        fig = px.scatter(scatter_df, x='tenure', y='MonthlyCharges', color='Churn', 
+                        size='TotalCharges', hover_name='Contract',
+                        hover_data=['PaymentMethod', 'InternetService'],
+                        title='Monthly Charges vs. Tenure by Churn Status',
+                        color_discrete_sequence=['#3498db', '#e74c3c'])
+        fig.update_layout(xaxis_title='Tenure (months)', yaxis_title='Monthly Charges ($)')
+        return fig
+    show_figure(('contract', 'scatter', key), version, scatter_chart)
     
     # Insights
     st.markdown("""
@@ -1025,41 +1227,59 @@ def contract_charges_analysis(df):
     """, unsafe_allow_html=True)
 
 # Churn Prediction Page
-def churn_prediction(df):
+def churn_prediction(rows, aggregates, version):
     st.markdown("<h2 class='sub-header'>Churn Prediction Factors</h2>", unsafe_allow_html=True)
     
     # Feature importance visualizations
+    with span("feature importance"):
+        cat_importance, num_importance = load_feature_importance(aggregates, version)
     col1, col2 = st.columns(2)
     
     with col1:
-        # Create categorical feature importance chart
-        categorical_features = ['Contract', 'PaymentMethod', 'InternetService', 'OnlineSecurity', 'TechSupport']
-        cat_importance = []
-        for feature in categorical_features:
-            importance = df.groupby(feature)['Churn'].apply(
-                lambda x: (x == 'Yes').mean() * 100).max()
-            cat_importance.append({'Feature': feature, 'Importance': importance})
-        
-        cat_importance_df = pd.DataFrame(cat_importance)
-        fig = px.bar(cat_importance_df, x='Feature', y='Importance',
-                    title="Categorical Features Importance",
-                    color='Importance', color_continuous_scale='Reds')
-        st.plotly_chart(fig, use_container_width=True)
+        # Mutual information of every categorical feature with churn
+        def categorical_importance_chart():
+            fig = px.bar(cat_importance, x='Mutual Information', y='Feature', orientation='h',
+                         title="Categorical Features Importance",
+                         color='Mutual Information', color_continuous_scale='Reds',
+                         hover_data=['Chi-square', "Cramér's V", 'Churn Rate Spread (pp)'])
+            fig.update_layout(yaxis={'categoryorder': 'total ascending'}, height=500)
+            return fig
+        show_figure(('prediction', 'categorical-importance'), version, categorical_importance_chart)
     
     with col2:
-        # Create numerical feature importance chart
-        numerical_features = ['tenure', 'MonthlyCharges', 'TotalCharges']
-        num_importance = []
-        for feature in numerical_features:
-            # Calculate correlation with churn
-            correlation = df[feature].corr(df['Churn'].map({'Yes': 1, 'No': 0}))
-            num_importance.append({'Feature': feature, 'Correlation': abs(correlation)})
-        
-        num_importance_df = pd.DataFrame(num_importance)
-        fig = px.bar(num_importance_df, x='Feature', y='Correlation',
-                    title="Numerical Features Importance",
-                    color='Correlation', color_continuous_scale='Blues')
-        st.plotly_chart(fig, use_container_width=True)
+        # Point-biserial correlation of every numerical feature with churn
+        def numerical_importance_chart():
+            return px.bar(num_importance, x='Feature', y='|Correlation|',
+                          title="Numerical Features Importance",
+                          color='|Correlation|', color_continuous_scale='Blues',
+                          hover_data=['Correlation'])
+        show_figure(('prediction', 'numerical-importance'), version, numerical_importance_chart)
+    
+    # Scores of every customer
+    st.markdown("<h3 class='sub-header'>Customer Base Risk Distribution</h3>", unsafe_allow_html=True)
+    
+    model_choice = st.radio("Scoring model", ["Fitted on this dataset", "Rule-based"], horizontal=True)
+    with span("churn model"):
+        model = load_churn_model(rows, version) if model_choice == "Fitted on this dataset" else None
+    if model is not None and 'holdout_auc' in model.metrics:
+        st.caption(f"Logistic regression fitted on {model.metrics['train_rows']:,} customers, "
+                   f"holdout AUC {model.metrics['holdout_auc']:.3f}, "
+                   f"accuracy {model.metrics['holdout_accuracy'] * 100:.1f}%.")
+        if load_model_store().training:
+            st.caption("The data has changed; the model is being refitted in the background "
+                       "and the previous fit is shown until it is ready.")
+    
+    def risk_chart():
+        risk = risk_distribution(rows(), model)
+        fig = px.bar(risk, x='Risk Category', y='Customers',
+                    title='Customers by Estimated Churn Risk',
+                    color='Risk Category', color_discrete_sequence=['green', 'gold', 'orange', 'red'],
+                    hover_data=['Mean Probability (%)', 'Actual Churn Rate (%)'])
+        fig.update_layout(showlegend=False)
+        return fig
+    show_figure(('prediction', 'risk-distribution', model_choice, model and model.dataset), version, risk_chart)
+    if aggregates.sample is not None and len(aggregates.sample) < aggregates.rows:
+        st.caption(f"Scores a random sample of {len(aggregates.sample):,} of {aggregates.rows:,} customers.")
     
     # Interactive churn probability calculator
     st.markdown("<h3 class='sub-header'>Interactive Churn Risk Calculator</h3>", unsafe_allow_html=True)
@@ -1090,99 +1310,47 @@ def churn_prediction(df):
         monthly_charges = st.slider("Monthly Charges ($)", min_value=18, max_value=120, value=70)
         senior = st.selectbox("Senior Citizen", options=['No', 'Yes'])
     
-    # Calculate estimated churn probability based on selected parameters
-    # This is a simplified model based on the analysis findings
-    
-    # Base probability
-    churn_prob = 26.54  # Overall churn rate
-    
-    # Contract adjustment (strongest factor)
-    if contract == 'Month-to-month':
-        churn_prob *= 1.6  # Increase probability
-    elif contract == 'One year':
-        churn_prob *= 0.42  # Decrease probability
-    elif contract == 'Two year':
-        churn_prob *= 0.11  # Decrease probability significantly
-    
-    # Tenure adjustment
-    if tenure < 12:
-        churn_prob *= 1.8  # Increase probability for new customers
-    elif tenure > 40:
-        churn_prob *= 0.4  # Decrease probability for long-term customers
-    
-    # Internet service adjustment
-    if internet == 'Fiber optic':
-        churn_prob *= 1.5  # Increase probability
-    elif internet == 'No':
-        churn_prob *= 0.3  # Decrease probability significantly
-    
-    # Security and support adjustment
-    if security == 'No' and internet != 'No internet service':
-        churn_prob *= 1.3  # Increase probability
-    if tech_support == 'No' and internet != 'No internet service':
-        churn_prob *= 1.3  # Increase probability
-    
-    # Payment method adjustment
-    if payment == 'Electronic check':
-        churn_prob *= 1.4  # Increase probability
-    elif payment in ['Bank transfer (automatic)', 'Credit card (automatic)']:
-        churn_prob *= 0.7  # Decrease probability
-    
-    # Monthly charges adjustment
-    if monthly_charges > 80:
-        churn_prob *= 1.3  # Increase probability for high charges
-    elif monthly_charges < 40:
-        churn_prob *= 0.7  # Decrease probability for low charges
-    
-    # Senior citizen adjustment
-    if senior == 'Yes':
-        churn_prob *= 1.2  # Slight increase in probability
-    
-    # Paperless billing adjustment
-    if paperless == 'Yes':
-        churn_prob *= 1.1  # Slight increase in probability
-    
-    # Cap probability between 1% and 99%
-    churn_prob = max(1, min(99, churn_prob))
+    # Calculate estimated churn probability based on selected parameters,
+    # with the same model that scores the whole customer base above.
+    # Attributes the calculator does not ask for take their dataset average.
+    customer = pd.DataFrame({
+        'Contract': [contract], 'InternetService': [internet], 'OnlineSecurity': [security],
+        'TechSupport': [tech_support], 'PaymentMethod': [payment], 'PaperlessBilling': [paperless],
+        'tenure': [tenure], 'MonthlyCharges': [monthly_charges], 'TotalCharges': [tenure * monthly_charges],
+        'SeniorCitizen': [senior],
+    })
+    churn_prob = float(churn_probabilities(customer, model)[0])
     
     # Display the estimated churn probability
     st.markdown("<h3>Estimated Churn Probability</h3>", unsafe_allow_html=True)
     
     # Create a gauge chart for churn probability
-    fig = go.Figure(go.Indicator(
-        mode = "gauge+number",
-        value = churn_prob,
-        domain = {'x': [0, 1], 'y': [0, 1]},
-        title = {'text': "Churn Probability (%)"},
-        gauge = {
-            'axis': {'range': [0, 100]},
-            'bar': {'color': "darkblue"},
-            'steps': [
-                {'range': [0, 20], 'color': "green"},
-                {'range': [20, 40], 'color': "yellow"},
-                {'range': [40, 60], 'color': "orange"},
-                {'range': [60, 100], 'color': "red"}
-            ],
-            'threshold': {
-                'line': {'color': "red", 'width': 4},
-                'thickness': 0.75,
-                'value': churn_prob
+    def gauge_chart():
+        return go.Figure(go.Indicator(
+            mode = "gauge+number",
+            value = churn_prob,
+            domain = {'x': [0, 1], 'y': [0, 1]},
+            title = {'text': "Churn Probability (%)"},
+            gauge = {
+                'axis': {'range': [0, 100]},
+                'bar': {'color': "darkblue"},
+                'steps': [
+                    {'range': [0, 20], 'color': "green"},
+                    {'range': [20, 40], 'color': "yellow"},
+                    {'range': [40, 60], 'color': "orange"},
+                    {'range': [60, 100], 'color': "red"}
+                ],
+                'threshold': {
+                    'line': {'color': "red", 'width': 4},
+                    'thickness': 0.75,
+                    'value': churn_prob
+                }
             }
-        }
-    ))
-    
-    st.plotly_chart(fig, use_container_width=True)
+        ))
+    show_figure(('prediction', 'gauge', round(churn_prob, 4)), version, gauge_chart)
     
     # Risk category
-    risk_category = ""
-    if churn_prob < 20:
-        risk_category = "Low Risk"
-    elif churn_prob < 40:
-        risk_category = "Moderate Risk"
-    elif churn_prob < 60:
-        risk_category = "High Risk"
-    else:
-        risk_category = "Very High Risk"
+    risk_category = risk_categories([churn_prob])[0]
     
     st.markdown(f"""
     <div class='insight-text'>
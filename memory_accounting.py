@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+
+from caching import LRUCache, deep_size
+from data_loader import peak_memory
+
+# Warn when the process resident memory exceeds this many MB, 0 turns the
+# check off. Override with CHURN_MEMORY_BUDGET_MB.
+MEMORY_BUDGET_MB = float(os.environ.get("CHURN_MEMORY_BUDGET_MB", 0))
+# Show the Memory Debug panel in the sidebar
+MEMORY_DEBUG = os.environ.get("CHURN_MEMORY_DEBUG", "0") == "1"
+# Stack frames kept per allocation while tracemalloc is tracing
+TRACEMALLOC_FRAMES = int(os.environ.get("CHURN_TRACEMALLOC_FRAMES", 10))
+# Sessions not seen for this many seconds are dropped from the report
+SESSION_TTL_SECONDS = 3600
+
+# Long-lived objects of the server process by name, held weakly so that
+# tracking never keeps a replaced dataset or cache alive
+_tracked = {}
+# Session id -> (bytes per session state key, last rerun time)
+_sessions = {}
+_lock = threading.Lock()
+
+
+# Register a long-lived object under name and return it, so loaders can
+# wrap their result: return track("dataset", IncrementalDataset(...))
+def track(name, value):
+    try:
+        ref = weakref.ref(value)
+    except TypeError:
+        # Objects without weakref support are held strongly
+        def ref():
+            return value
+    with _lock:
+        _tracked[name] = ref
+    return value
+
+
+# Sizes of the state of one session, called on every rerun
+def record_session(session_id, state):
+    sizes = {str(key): deep_size(value) for key, value in state.items()}
+    now = time.time()
+    with _lock:
+        _sessions[session_id] = (sizes, now)
+        for stale in [sid for sid, (_, seen) in _sessions.items() if now - seen > SESSION_TTL_SECONDS]:
+            del _sessions[stale]
+
+
+# Resident and peak resident memory of this process in MB
+def process_rss():
+    peak, _ = peak_memory()
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        current = peak
+    return current, peak
+
+
+# Deep size of every tracked object, of every entry of the tracked caches
+# and of every session's state
+def accounting_report(top_entries=20):
+    with _lock:
+        tracked = [(name, ref()) for name, ref in _tracked.items()]
+        sessions = {sid: dict(sizes) for sid, (sizes, _) in _sessions.items()}
+    objects, entries = [], []
+    for name, value in tracked:
+        if value is None:
+            continue
+        objects.append({'Object': name, 'MB': deep_size(value) / 2 ** 20})
+        if isinstance(value, LRUCache):
+            entries += [{'Cache': name, 'Key': repr(key)[:120], 'MB': nbytes / 2 ** 20}
+                        for key, nbytes in value.entries()]
+    entries = sorted(entries, key=lambda e: e['MB'], reverse=True)[:top_entries]
+    session_rows = [{'Session': sid[:8], 'Keys': len(sizes), 'MB': sum(sizes.values()) / 2 ** 20}
+                    for sid, sizes in sessions.items()]
+    rss, peak = process_rss()
+    accounted = sum(o['MB'] for o in objects) + sum(s['MB'] for s in session_rows)
+    return {'rss_mb': rss, 'peak_rss_mb': peak, 'accounted_mb': accounted, 'budget_mb': MEMORY_BUDGET_MB,
+            'objects': sorted(objects, key=lambda o: o['MB'], reverse=True),
+            'cache_entries': entries, 'sessions': session_rows}
+
+
+# Warning text when the process is over the memory budget, else None
+def budget_warning(budget_mb=MEMORY_BUDGET_MB):
+    if not budget_mb:
+        return None
+    rss, _ = process_rss()
+    if rss > budget_mb:
+        return f"Server memory {rss:,.0f} MB exceeds the budget of {budget_mb:,.0f} MB."
+    return None
+
+
+# On-demand tracemalloc snapshots of the whole process. Tracing starts with
+# the first snapshot, so allocators show up from the second one on; diff()
+# compares the last two snapshots, e.g. before and after a rerun.
+class AllocationSnapshots:
+    def __init__(self, frames=TRACEMALLOC_FRAMES):
+        self.frames = frames
+        self.previous = None
+        self.latest = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def take(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ])
+        with self._lock:
+            self.previous, self.latest = self.latest, snapshot
+        return snapshot
+
+    def stop(self):
+        tracemalloc.stop()
+        with self._lock:
+            self.previous = self.latest = None
+
+    # Largest allocation sites of the latest snapshot
+    def top(self, limit=15, group_by='lineno'):
+        if self.latest is None:
+            return []
+        return [{'Location': str(stat.traceback[0]), 'MB': stat.size / 2 ** 20, 'Blocks': stat.count}
+                for stat in self.latest.statistics(group_by)[:limit]]
+
+    # Allocation sites that grew or shrank most between the last two snapshots
+    def diff(self, limit=15, group_by='lineno'):
+        if self.previous is None or self.latest is None:
+            return []
+        return [{'Location': str(stat.traceback[0]), 'Change (MB)': stat.size_diff / 2 ** 20,
+                 'MB': stat.size / 2 ** 20, 'Blocks': stat.count_diff}
+                for stat in self.latest.compare_to(self.previous, group_by)[:limit]]
+
+
+SNAPSHOTS = AllocationSnapshots()
@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Show the Profiler panel in the sidebar
+PROFILER_PANEL = os.environ.get("CHURN_PROFILER", "0") == "1"
+# Where to export the latency histograms: a Prometheus text file when the
+# name ends in .prom, otherwise a JSONL log with one snapshot per line
+PROFILE_LOG = os.environ.get("CHURN_PROFILE_LOG")
+# Minimum seconds between two exports
+PROFILE_FLUSH_SECONDS = float(os.environ.get("CHURN_PROFILE_FLUSH_SECONDS", "10"))
+# Upper bounds of the latency histogram buckets, in seconds
+SPAN_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+# Trace of the rerun running in this thread; Streamlit runs every session's
+# script in its own thread
+_local = threading.local()
+
+
+# Timing spans of one script rerun, in the order they started. Each span is
+# [name, depth, start offset, seconds].
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.depth = 0
+        self.started = time.perf_counter()
+        self.seconds = None
+
+
+def start_trace(name):
+    _local.trace = Trace(name)
+    return _local.trace
+
+
+# Close the trace of this thread, add its spans to the histograms and export
+# them when due
+def finish_trace():
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return None
+    _local.trace = None
+    trace.seconds = time.perf_counter() - trace.started
+    HISTOGRAMS.observe(f"rerun {trace.name}", trace.seconds)
+    for name, _, _, seconds in trace.spans:
+        if seconds is not None:
+            HISTOGRAMS.observe(name, seconds)
+    if PROFILE_LOG:
+        HISTOGRAMS.export_if_due(PROFILE_LOG)
+    return trace
+
+
+# Time the enclosed block as a span of the current trace. Costs next to
+# nothing outside a traced rerun, e.g. in background threads or scripts.
+@contextmanager
+def span(name):
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    record = [name, trace.depth, start - trace.started, None]
+    trace.spans.append(record)
+    trace.depth += 1
+    try:
+        yield
+    finally:
+        trace.depth -= 1
+        record[3] = time.perf_counter() - start
+
+
+# Cumulative latency histograms per span name, shared by all sessions
+class LatencyHistograms:
+    def __init__(self, buckets=SPAN_BUCKETS):
+        self.buckets = np.asarray(buckets)
+        self.counts = {}
+        self.sums = {}
+        self._lock = threading.Lock()
+        self._exported = 0.0
+
+    def observe(self, name, seconds):
+        with self._lock:
+            if name not in self.counts:
+                self.counts[name] = np.zeros(len(self.buckets) + 1, dtype='int64')
+                self.sums[name] = 0.0
+            self.counts[name][np.searchsorted(self.buckets, seconds)] += 1
+            self.sums[name] += seconds
+
+    # Estimated percentiles (0-100) of one span in seconds, interpolated
+    # within the bucket they fall in
+    def percentiles(self, name, ps=(50, 95, 99)):
+        with self._lock:
+            counts = self.counts[name].copy()
+        cumulative = np.cumsum(counts)
+        edges = np.concatenate([[0.0], self.buckets, [self.buckets[-1]]])
+        result = []
+        for p in ps:
+            target = cumulative[-1] * p / 100
+            i = min(int(np.searchsorted(cumulative, target)), len(counts) - 1)
+            below = cumulative[i - 1] if i else 0
+            fraction = (target - below) / counts[i] if counts[i] else 1.0
+            result.append(edges[i] + (edges[i + 1] - edges[i]) * fraction)
+        return result
+
+    def summary(self):
+        with self._lock:
+            names = sorted(self.counts)
+            totals = {name: (int(self.counts[name].sum()), self.sums[name]) for name in names}
+        rows = []
+        for name in names:
+            count, total = totals[name]
+            p50, p95, p99 = self.percentiles(name)
+            rows.append({'Span': name, 'Count': count, 'Mean (ms)': total / count * 1000,
+                         'p50 (ms)': p50 * 1000, 'p95 (ms)': p95 * 1000, 'p99 (ms)': p99 * 1000})
+        return rows
+
+    # Histograms in the Prometheus text exposition format
+    def prometheus(self):
+        lines = ["# HELP churn_span_seconds Duration of timed sections of the dashboard.",
+                 "# TYPE churn_span_seconds histogram"]
+        with self._lock:
+            for name in sorted(self.counts):
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                cumulative = np.cumsum(self.counts[name])
+                for bound, count in zip(self.buckets, cumulative):
+                    lines.append(f'churn_span_seconds_bucket{{span="{label}",le="{bound:g}"}} {count}')
+                lines.append(f'churn_span_seconds_bucket{{span="{label}",le="+Inf"}} {cumulative[-1]}')
+                lines.append(f'churn_span_seconds_sum{{span="{label}"}} {self.sums[name]:.6f}')
+                lines.append(f'churn_span_seconds_count{{span="{label}"}} {cumulative[-1]}')
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        with self._lock:
+            return {'time': time.time(), 'buckets': self.buckets.tolist(),
+                    'spans': {name: {'counts': self.counts[name].tolist(), 'sum': self.sums[name]}
+                              for name in sorted(self.counts)}}
+
+    # Rewrite the Prometheus file, or append a snapshot to the JSONL log, at
+    # most once per PROFILE_FLUSH_SECONDS
+    def export_if_due(self, path, interval=PROFILE_FLUSH_SECONDS):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._exported < interval:
+                return
+            self._exported = now
+        if path.endswith(".prom"):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                f.write(self.prometheus())
+            os.replace(tmp, path)
+        else:
+            with open(path, "a") as f:
+                f.write(json.dumps(self.snapshot()) + "\n")
+
+
+HISTOGRAMS = LatencyHistograms()
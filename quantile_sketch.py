@@ -0,0 +1,206 @@
+import numpy as np
+
+# Size parameter of every sketch. A sketch keeps about 3 * k values however
+# many it has seen; see rank_error() for the resulting accuracy.
+SKETCH_K = 200
+# Sketches are kept per value of these columns and per churn class, so any
+# filter over them is answered by merging sketches
+SKETCH_DIMENSIONS = ['Contract', 'PaymentMethod']
+SKETCH_COLUMNS = ['tenure', 'MonthlyCharges', 'TotalCharges']
+
+
+# Rank error of a quantile query as a fraction of the count, at 99%
+# confidence (the empirical bound published for KLL sketches). For k=200 a
+# median query returns a value whose true rank is within about 1.3% of the
+# count from 50%. Values removed again (see QuantileSketches.subtract) add
+# their count to the count this fraction applies to.
+def rank_error(k=SKETCH_K):
+    return 2.296 / k ** 0.9723
+
+
+# KLL quantile sketch (Karnin, Lang and Liberty, 2016). Values enter level 0;
+# a level that outgrows its capacity is sorted and every other value, from a
+# random offset, moves up one level with twice the weight. Capacities shrink
+# by 2/3 per level below the top, so the sketch stays O(k) in size while the
+# rank error stays within rank_error(k). Sketches of disjoint data merge by
+# concatenating their levels. Count, sum, min and max are exact.
+class KLLSketch:
+    def __init__(self, k=SKETCH_K, seed=0):
+        self.k = k
+        self.count = 0
+        self.total = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            level = next(h for h, items in enumerate(self.levels) if len(items) >= self._capacity(h))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # An odd value out stays behind, the rest are halved
+            keep, items = items[:len(items) % 2], items[len(items) % 2:]
+            promoted = items[self._rng.integers(2)::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+        return self
+
+    # Retained values and their weights
+    def items(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self.levels)])
+        return values, weights
+
+    def quantiles(self, qs):
+        return weighted_quantiles([self], [], qs)
+
+    def nbytes(self):
+        return sum(items.nbytes for items in self.levels)
+
+
+# Quantiles qs of the values in `added` minus the values in `removed`. A
+# rank is the weight at or below a value in the added sketches less that in
+# the removed ones, so the answer is the smallest retained value whose rank
+# reaches q times the remaining count.
+def weighted_quantiles(added, removed, qs):
+    qs = np.atleast_1d(np.asarray(qs, dtype='float64'))
+    parts = [sketch.items() for sketch in added] + \
+            [(values, -weights) for values, weights in (sketch.items() for sketch in removed)]
+    count = sum(sketch.count for sketch in added) - sum(sketch.count for sketch in removed)
+    if not parts or count <= 0:
+        return np.full(len(qs), np.nan)
+    values = np.concatenate([values for values, _ in parts])
+    weights = np.concatenate([weights for _, weights in parts])
+    order = np.argsort(values, kind='stable')
+    values, ranks = values[order], np.cumsum(weights[order])
+    # Ranks may dip where removed values sit, the running maximum keeps them monotone
+    ranks = np.maximum.accumulate(ranks)
+    positions = np.searchsorted(ranks, qs * count, side='left')
+    return values[np.minimum(positions, len(values) - 1)]
+
+
+# KLL sketches of the numeric columns per churn class and per combination
+# of the dimension columns, updated chunk by chunk next to the aggregates.
+# Sketches cannot forget values, so rows taken out again (customers replaced
+# by a delta file) go into sketches of removed values that queries subtract.
+class QuantileSketches:
+    def __init__(self, columns=SKETCH_COLUMNS, dimensions=SKETCH_DIMENSIONS, k=SKETCH_K):
+        self.columns = list(columns)
+        self.dimensions = list(dimensions)
+        self.k = k
+        # (column, dimension values..., churn) -> sketch
+        self.added = {}
+        self.removed = {}
+
+    def update(self, chunk, sign=1):
+        if not len(chunk):
+            return self
+        sketches = self.added if sign > 0 else self.removed
+        churn = ((chunk['churn_flag'] == 1) if 'churn_flag' in chunk.columns else (chunk['Churn'] == 'Yes')).to_numpy()
+        # One integer per combination of the category codes and the churn class
+        codes = churn.astype('int64')
+        levels = [np.array(['No', 'Yes'], dtype=object)]
+        for col in reversed(self.dimensions):
+            values = chunk[col].astype('category')
+            categories = np.append(values.cat.categories.to_numpy(dtype=object), None)  # code -1 is missing
+            codes = codes + (values.cat.codes.to_numpy().astype('int64') % len(categories)) * \
+                np.prod([len(level) for level in levels])
+            levels.insert(0, categories)
+        shape = [len(level) for level in levels]
+        if np.prod(shape) < 2 ** 15:
+            codes = codes.astype('int16')  # stable argsort is a radix sort for 16-bit integers
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        bounds = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1], True])
+        groups = [tuple(level[i] for level, i in zip(levels, np.unravel_index(code, shape)))
+                  for code in codes[bounds[:-1]]]
+        for col in self.columns:
+            values = chunk[col].to_numpy(dtype='float64')[order]
+            for g, group in enumerate(groups):
+                key = (col,) + group
+                if key not in sketches:
+                    sketches[key] = KLLSketch(self.k, seed=len(sketches))
+                sketches[key].update(values[bounds[g]:bounds[g + 1]])
+        return self
+
+    def subtract(self, chunk):
+        return self.update(chunk, sign=-1)
+
+    def merge(self, other):
+        for mine, theirs in [(self.added, other.added), (self.removed, other.removed)]:
+            for key, sketch in theirs.items():
+                if key in mine:
+                    mine[key].merge(sketch)
+                else:
+                    mine[key] = KLLSketch(self.k, seed=len(mine)).merge(sketch)
+        return self
+
+    # Sketches of column whose dimension values pass filters ({column: values})
+    # and whose churn class is churn (both classes when None)
+    def _select(self, sketches, column, filters, churn):
+        filters = filters or {}
+        selected = []
+        for key, sketch in sketches.items():
+            if key[0] != column or (churn is not None and key[-1] != churn):
+                continue
+            if all(key[1 + i] in filters[dim] for i, dim in enumerate(self.dimensions) if dim in filters):
+                selected.append(sketch)
+        return selected
+
+    def quantiles(self, column, qs, filters=None, churn=None):
+        return weighted_quantiles(self._select(self.added, column, filters, churn),
+                                  self._select(self.removed, column, filters, churn), qs)
+
+    # Box plot statistics like charts.box_stats(), from the sketches. The
+    # whiskers end at the retained values nearest inside the Tukey fences, or
+    # at the exact min/max when no value lies outside them.
+    def box_stats(self, column, filters=None, churn=None):
+        added = self._select(self.added, column, filters, churn)
+        removed = self._select(self.removed, column, filters, churn)
+        count = sum(s.count for s in added) - sum(s.count for s in removed)
+        if count <= 0:
+            return None
+        q1, median, q3 = weighted_quantiles(added, removed, [0.25, 0.5, 0.75])
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        # Min and max of removed values cannot be taken back, so these are bounds
+        minimum = min(s.minimum for s in added)
+        maximum = max(s.maximum for s in added)
+        values = np.concatenate([s.items()[0] for s in added])
+        return {'q1': q1, 'median': median, 'q3': q3,
+                'mean': (sum(s.total for s in added) - sum(s.total for s in removed)) / count,
+                'lowerfence': minimum if minimum >= low else values[values >= low].min(),
+                'upperfence': maximum if maximum <= high else values[values <= high].max(),
+                'count': count}
+
+    def nbytes(self):
+        return sum(s.nbytes() for sketches in [self.added, self.removed] for s in sketches.values())
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+STATS_COLUMNS = ['tenure', 'MonthlyCharges', 'TotalCharges', 'churn_flag']
+
+
+# Count, mean, variance, min/max and pairwise co-moments of a few numeric
+# columns, kept without holding the rows. Chunks are folded in with the
+# pairwise (Chan et al.) form of Welford's update, which stays accurate for
+# large counts, so partial results from separate chunks or processes merge
+# exactly. Rows with a missing value in any column are skipped.
+class RunningStats:
+    def __init__(self, columns=STATS_COLUMNS):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.count = 0
+        self.means = np.zeros(k)
+        # Sums of products of deviations from the mean, the diagonal holds
+        # the sums of squares
+        self.comoments = np.zeros((k, k))
+        self.minimum = np.full(k, np.inf)
+        self.maximum = np.full(k, -np.inf)
+
+    # Count, means and co-moments of one chunk
+    def _chunk_moments(self, chunk):
+        values = np.column_stack([
+            (chunk[col] == 'Yes').to_numpy(dtype='float64')
+            if col == 'churn_flag' and col not in chunk.columns else chunk[col].to_numpy(dtype='float64')
+            for col in self.columns])
+        values = values[np.isfinite(values).all(axis=1)]
+        if not len(values):
+            return 0, np.zeros(len(self.columns)), np.zeros((len(self.columns),) * 2), values
+        means = values.mean(axis=0)
+        centered = values - means
+        return len(values), means, centered.T @ centered, values
+
+    # Chan's combination of (count, means, co-moments) of two disjoint parts
+    def _combine(self, count, means, comoments):
+        total = self.count + count
+        if not count or not total:
+            return
+        delta = means - self.means
+        self.comoments += comoments + np.outer(delta, delta) * (self.count * count / total)
+        self.means += delta * (count / total)
+        self.count = total
+
+    def update(self, chunk):
+        count, means, comoments, values = self._chunk_moments(chunk)
+        if count:
+            self._combine(count, means, comoments)
+            self.minimum = np.minimum(self.minimum, values.min(axis=0))
+            self.maximum = np.maximum(self.maximum, values.max(axis=0))
+        return self
+
+    # Take rows that were added before back out, e.g. customers replaced by a
+    # delta file. Min and max cannot be recomputed without the rows, so after
+    # a removal they are bounds of the remaining values rather than exact.
+    def subtract(self, chunk):
+        count, means, comoments, _ = self._chunk_moments(chunk)
+        if not count:
+            return self
+        rest = self.count - count
+        if rest <= 0:
+            self.count = 0
+            self.means[:] = 0.0
+            self.comoments[:] = 0.0
+            return self
+        rest_means = (self.means * self.count - means * count) / rest
+        delta = means - rest_means
+        self.comoments -= comoments + np.outer(delta, delta) * (rest * count / self.count)
+        self.means = rest_means
+        self.count = rest
+        return self
+
+    def merge(self, other):
+        self._combine(other.count, other.means, other.comoments)
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        return self
+
+    def mean(self, column):
+        return self.means[self.columns.index(column)] if self.count else float('nan')
+
+    # Sample variance (ddof=1), like Series.var()
+    def variance(self, column):
+        i = self.columns.index(column)
+        return self.comoments[i, i] / (self.count - 1) if self.count > 1 else float('nan')
+
+    def std(self, column):
+        return np.sqrt(self.variance(column))
+
+    def covariance(self, a, b):
+        i, j = self.columns.index(a), self.columns.index(b)
+        return self.comoments[i, j] / (self.count - 1) if self.count > 1 else float('nan')
+
+    # Pearson correlations between all columns; with churn_flag this is the
+    # point-biserial correlation
+    def correlations(self):
+        scale = np.sqrt(np.diag(self.comoments))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoments / np.outer(scale, scale)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    # One row per column, like df.describe() without the quartiles
+    def summary(self):
+        return pd.DataFrame({
+            'count': self.count,
+            'mean': [self.mean(col) for col in self.columns],
+            'std': [self.std(col) for col in self.columns],
+            'min': self.minimum,
+            'max': self.maximum,
+        }, index=self.columns)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+# Overall churn rate the rule-based model starts from, in percent
+BASE_CHURN_RATE = 26.54
+# Upper bounds of the risk categories, in percent
+RISK_BINS = [20, 40, 60]
+RISK_LABELS = ['Low Risk', 'Moderate Risk', 'High Risk', 'Very High Risk']
+
+# Multipliers of the rule-based model per value of a categorical column,
+# values not listed leave the probability unchanged
+CATEGORY_MULTIPLIERS = {
+    # Contract adjustment (strongest factor)
+    'Contract': {'Month-to-month': 1.6, 'One year': 0.42, 'Two year': 0.11},
+    # Internet service adjustment
+    'InternetService': {'Fiber optic': 1.5, 'No': 0.3},
+    # Payment method adjustment
+    'PaymentMethod': {'Electronic check': 1.4, 'Bank transfer (automatic)': 0.7,
+                      'Credit card (automatic)': 0.7},
+    # Senior citizen adjustment
+    'SeniorCitizen': {'Yes': 1.2},
+    # Paperless billing adjustment
+    'PaperlessBilling': {'Yes': 1.1},
+}
+
+
+# Multiplier of every row for one categorical column, looked up once per
+# category instead of once per row
+def _category_factors(values, multipliers):
+    values = values.astype('category')
+    table = np.array([multipliers.get(value, 1.0) for value in values.cat.categories] + [1.0],
+                     dtype='float32')
+    return table[values.cat.codes.to_numpy()]  # code -1 (missing) picks the trailing 1.0
+
+
+# Churn probability in percent for every row of df, in one vectorized pass.
+# Without a fitted model (see churn_model.py) this is the simplified
+# rule-based model built from the analysis findings.
+def churn_probabilities(df, model=None):
+    if model is not None:
+        return (model.predict_proba(df) * 100).astype('float32')
+    prob = np.full(len(df), BASE_CHURN_RATE, dtype='float32')
+    for col, multipliers in CATEGORY_MULTIPLIERS.items():
+        prob *= _category_factors(df[col], multipliers)
+
+    # Tenure adjustment
+    tenure = df['tenure'].to_numpy()
+    prob *= np.where(tenure < 12, 1.8, np.where(tenure > 40, 0.4, 1.0)).astype('float32')
+
+    # Security and support adjustment
+    has_internet = (df['InternetService'] != 'No internet service').to_numpy()
+    for col in ['OnlineSecurity', 'TechSupport']:
+        prob *= np.where((df[col] == 'No').to_numpy() & has_internet, 1.3, 1.0).astype('float32')
+
+    # Monthly charges adjustment
+    charges = df['MonthlyCharges'].to_numpy()
+    prob *= np.where(charges > 80, 1.3, np.where(charges < 40, 0.7, 1.0)).astype('float32')
+
+    # Cap probability between 1% and 99%
+    return np.clip(prob, 1, 99)
+
+
+# Risk category of each probability
+def risk_categories(prob):
+    codes = np.searchsorted(RISK_BINS, prob, side='right')
+    return pd.Categorical.from_codes(codes, categories=RISK_LABELS, ordered=True)
+
+
+# Probability and risk category for every customer of df
+def score_customers(df, model=None):
+    prob = churn_probabilities(df, model)
+    scores = pd.DataFrame({'Churn Probability (%)': prob, 'Risk Category': risk_categories(prob)},
+                          index=df.index)
+    if 'customerID' in df.columns:
+        scores.insert(0, 'customerID', df['customerID'])
+    return scores
+
+
+# Customers, actual churn rate and mean predicted probability per risk category
+def risk_distribution(df, model=None):
+    prob = churn_probabilities(df, model)
+    codes = np.searchsorted(RISK_BINS, prob, side='right')
+    customers = np.bincount(codes, minlength=len(RISK_LABELS))
+    churned = np.bincount(codes, weights=(df['Churn'] == 'Yes').to_numpy(), minlength=len(RISK_LABELS))
+    predicted = np.bincount(codes, weights=prob, minlength=len(RISK_LABELS))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame({
+            'Risk Category': pd.Categorical(RISK_LABELS, categories=RISK_LABELS, ordered=True),
+            'Customers': customers,
+            'Actual Churn Rate (%)': churned / customers * 100,
+            'Mean Probability (%)': predicted / customers,
+        })
@@ -0,0 +1,214 @@
+import argparse
+import hashlib
+import mmap
+import os
+import pickle
+import stat
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks, workers starting together may each publish
+    fcntl = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # string columns are then pickled in band
+    pa = None
+
+from aggregation import aggregate_frame
+from bitmap_index import BitmapIndex
+from data_loader import CACHE_DIR, DATA_PATH, DELTA_DIR, dataset_version, load_churn_data
+from delta_ingest import IncrementalDataset, delta_files
+
+# Directory of the published snapshots, override with CHURN_SHARED_DIR. On
+# /dev/shm they live in POSIX shared memory instead of the page cache of a
+# file on disk.
+SHARED_DIR = os.environ.get("CHURN_SHARED_DIR", CACHE_DIR)
+# First bytes of every snapshot file, bump with its layout
+MAGIC = b"CHURNSH1"
+# Buffers start at multiples of this many bytes, so mapped arrays are aligned
+ALIGNMENT = 64
+# Errors of a snapshot file that is missing, cut short or written by other code
+_UNREADABLE = (OSError, ValueError, AttributeError, pickle.UnpicklingError)
+
+
+# Version of the snapshot for a source version (see dataset_version()) and
+# the delta files, it changes whenever either does. None without a source.
+def snapshot_version(source_version, delta_dir=DELTA_DIR):
+    if source_version is None:
+        return None
+    digest = hashlib.sha256()
+    for name in delta_files(delta_dir):
+        info = os.stat(os.path.join(delta_dir, name))
+        digest.update(f"{name}:{info.st_size}:{info.st_mtime_ns}\n".encode())
+    return f"{source_version}-{digest.hexdigest()[:16]}"
+
+
+# What the pages read, published once for every server process on the host:
+# the rows with all delta files applied, their aggregates and bitmap index.
+# Attached copies hold read-only views of the mapped snapshot file.
+class SharedDataset:
+    def __init__(self, frame, aggregates, index, applied, version):
+        self.frame = frame
+        self.aggregates = aggregates
+        self.index = index
+        self.applied = list(applied)
+        self.version = version
+
+    # Cheap view of the rows for one page run, see IncrementalDataset.view()
+    def view(self):
+        return self.frame.copy(deep=False)
+
+
+# String columns held as Python objects (pandas < 3) are pickled in band,
+# so every attached process would unpickle its own copy. Arrow-backed
+# strings are buffers like the other columns and stay in the mapping.
+def _shareable(frame):
+    strings = [col for col in frame.columns if pd.api.types.is_string_dtype(frame[col].dtype)
+               and getattr(frame[col].dtype, "storage", None) != "pyarrow"]
+    if not strings or pa is None:
+        return frame
+    return frame.astype({col: pd.StringDtype("pyarrow") for col in strings})
+
+
+def build_shared_dataset(version, path=DATA_PATH, delta_dir=DELTA_DIR):
+    df = load_churn_data(path)
+    dataset = IncrementalDataset(df, aggregate_frame(df))
+    dataset.refresh(delta_dir)
+    frame = _shareable(dataset.frame)
+    return SharedDataset(frame, dataset.aggregates, BitmapIndex(frame), dataset.applied, version)
+
+
+# Pickle obj with its arrays out of band (protocol 5). The file holds the
+# magic, the header size, a header with the pickle stream and buffer sizes,
+# then every buffer at an aligned offset.
+def write_snapshot(obj, target):
+    buffers = []
+    stream = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    views = [buffer.raw() for buffer in buffers]
+    header = pickle.dumps((stream, [view.nbytes for view in views]), protocol=5)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + len(header).to_bytes(8, "little") + header)
+        for view in views:
+            f.write(bytes(-f.tell() % ALIGNMENT))
+            f.write(view)
+    os.replace(tmp_path, target)
+
+
+# Map a snapshot file and unpickle it on top of the mapping. Its arrays come
+# back as read-only views of the mapped pages, which the OS shares between
+# every process that maps the file, so attaching copies no data. Unpickling
+# runs code named in the file, so files of other users are refused.
+def read_snapshot(target):
+    with open(os.open(target, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0)), "rb") as f:
+        if hasattr(os, "getuid") and os.fstat(f.fileno()).st_uid != os.getuid():
+            raise PermissionError(f"{target} is not owned by this user")
+        view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    if view[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{target} is not a dataset snapshot")
+    start = len(MAGIC) + 8
+    offset = start + int.from_bytes(view[len(MAGIC):start], "little")
+    stream, sizes = pickle.loads(view[start:offset])
+    buffers = []
+    for size in sizes:
+        offset += -offset % ALIGNMENT
+        buffers.append(view[offset:offset + size])
+        offset += size
+    return pickle.loads(stream, buffers=buffers)
+
+
+# Directory of this user's snapshots under shared_dir, which may be writable
+# by everyone (/dev/shm). It is used only when it is a real directory owned
+# by this user, and kept at mode 0700, so no other user can plant a snapshot
+# for the dashboard to unpickle.
+def _private_dir(shared_dir):
+    if not hasattr(os, "getuid"):
+        os.makedirs(shared_dir, exist_ok=True)
+        return shared_dir
+    private = os.path.join(shared_dir, f"churn-snapshots-{os.getuid()}")
+    os.makedirs(private, mode=0o700, exist_ok=True)
+    info = os.lstat(private)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{private} must be a directory owned by this user")
+    if info.st_mode & 0o077:
+        os.chmod(private, 0o700)
+    return private
+
+
+def _snapshot_path(version, path, shared_dir):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(_private_dir(shared_dir), f"{stem}-{version}.snapshot")
+
+
+# Held while one process publishes, the others wait for it
+@contextmanager
+def _publish_lock(path, shared_dir):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    with open(os.path.join(_private_dir(shared_dir), f"{stem}.lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+# Remove snapshots of the same source with another version. Processes that
+# still map one keep reading it until they let go.
+def _prune_snapshots(path, keep, shared_dir):
+    stem = os.path.splitext(os.path.basename(path))[0] + "-"
+    directory = _private_dir(shared_dir)
+    for name in os.listdir(directory):
+        full = os.path.join(directory, name)
+        if name.startswith(stem) and name.endswith(".snapshot") and full != keep:
+            try:
+                os.remove(full)
+            except OSError:
+                pass
+
+
+# Attach to the snapshot of version, publishing it first when no process on
+# the host has yet. Only the publisher loads the source and applies the
+# deltas; it then maps the file like everyone else and drops its own copy.
+def attach_dataset(version, path=DATA_PATH, delta_dir=DELTA_DIR, shared_dir=SHARED_DIR):
+    target = _snapshot_path(version, path, shared_dir)
+    try:
+        return read_snapshot(target)
+    except _UNREADABLE:
+        pass  # not published yet or unreadable, publish it below
+    with _publish_lock(path, shared_dir):
+        try:
+            return read_snapshot(target)  # published while we waited
+        except _UNREADABLE:
+            pass
+        write_snapshot(build_shared_dataset(version, path, delta_dir), target)
+        _prune_snapshots(path, target, shared_dir)
+    return read_snapshot(target)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish the dataset snapshot shared by the dashboard processes.")
+    parser.add_argument("--data", default=DATA_PATH, help="source CSV or Parquet file")
+    parser.add_argument("--delta-dir", default=DELTA_DIR, help="directory of delta files to apply")
+    parser.add_argument("--shared-dir", default=SHARED_DIR, help="where to publish the snapshot")
+    args = parser.parse_args(argv)
+
+    version = snapshot_version(dataset_version(args.data), args.delta_dir)
+    if version is None:
+        parser.error(f"{args.data} does not exist")
+    start = time.perf_counter()
+    dataset = attach_dataset(version, args.data, args.delta_dir, args.shared_dir)
+    elapsed = time.perf_counter() - start
+    target = _snapshot_path(version, args.data, args.shared_dir)
+    print(f"{target}: {len(dataset.frame):,} customers, {len(dataset.applied)} delta file(s), "
+          f"{os.path.getsize(target) / 2 ** 20:.1f} MB, ready in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    # Run the imported module, so snapshots refer to shared_dataset.SharedDataset
+    # rather than to __main__
+    import shared_dataset
+
+    shared_dataset.main()
@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
+
+from aggregation import churn_rates
+from downsampling import downsample_points
+from synthetic_data import generate_churn_data
 
 # Set page configuration
 st.set_page_config(
@@ -14,18 +15,8 @@ st.set_page_config(
 # Load sample data
 @st.cache_data
 def load_data():
-    np.random.seed(42)
-    n_samples = 1000
-    
-    data = {
-        'Contract': np.random.choice(['Month-to-month', 'One year', 'Two year'], n_samples, p=[0.5, 0.3, 0.2]),
-        'PaymentMethod': np.random.choice(['Electronic check', 'Mailed check', 'Bank transfer', 'Credit card'], n_samples),
-        'MonthlyCharges': np.random.uniform(18, 120, n_samples),
-        'tenure': np.random.randint(1, 73, n_samples),
-        'Churn': np.random.choice(['Yes', 'No'], n_samples, p=[0.265, 0.735])
-    }
-    
-    return pd.DataFrame(data)
+    columns = ['Contract', 'PaymentMethod', 'MonthlyCharges', 'tenure', 'Churn']
+    return generate_churn_data(1000, seed=42)[columns]
 
 # Main app
 def main():
@@ -56,8 +47,7 @@ def main():
     
     with col1:
         # Contract analysis
-        contract_churn = df.groupby('Contract')['Churn'].apply(
-            lambda x: (x == 'Yes').mean() * 100).reset_index()
+        contract_churn = churn_rates(df, ['Contract'])
         contract_churn.columns = ['Contract', 'Churn Rate (%)']
         
         fig = px.bar(contract_churn, x='Contract', y='Churn Rate (%)',
@@ -67,8 +57,7 @@ def main():
     
     with col2:
         # Payment method analysis
-        payment_churn = df.groupby('PaymentMethod')['Churn'].apply(
-            lambda x: (x == 'Yes').mean() * 100).reset_index()
+        payment_churn = churn_rates(df, ['PaymentMethod'])
         payment_churn.columns = ['Payment Method', 'Churn Rate (%)']
         
         fig = px.bar(payment_churn, x='Payment Method', y='Churn Rate (%)',
@@ -83,7 +72,7 @@ def main():
     
     filtered_df = df[df['Contract'] == selected_contract]
     
-    fig = px.scatter(filtered_df, x='tenure', y='MonthlyCharges', 
+    fig = px.scatter(downsample_points(filtered_df, 'tenure', 'MonthlyCharges'), x='tenure', y='MonthlyCharges', 
                     color='Churn', title=f"Tenure vs Monthly Charges ({selected_contract})")
     st.plotly_chart(fig, use_container_width=True)
     
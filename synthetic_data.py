@@ -0,0 +1,171 @@
+import argparse
+import os
+import time
+from collections import deque
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from data_loader import CHUNK_SIZE, ChunkWriter, peak_memory
+
+CONTRACTS = ['Month-to-month', 'One year', 'Two year']
+CONTRACT_SHARES = [0.55, 0.21, 0.24]
+# Tenure in months is 72 * Beta(a, b) per contract: short for month-to-month,
+# long for two-year contracts
+TENURE_SHAPES = np.array([[0.7, 2.0], [2.0, 1.4], [3.5, 1.0]])
+INTERNET = ['DSL', 'Fiber optic', 'No']
+INTERNET_SHARES = [0.34, 0.44, 0.22]
+ADDON_SERVICES = ['OnlineSecurity', 'OnlineBackup', 'DeviceProtection', 'TechSupport',
+                  'StreamingTV', 'StreamingMovies']
+# Chance of taking an add-on service with internet, per contract
+ADDON_RATES = np.array([0.3, 0.45, 0.55])
+PAYMENT_METHODS = ['Electronic check', 'Mailed check', 'Bank transfer (automatic)',
+                   'Credit card (automatic)']
+# Payment method shares per contract
+PAYMENT_SHARES = np.array([[0.50, 0.22, 0.14, 0.14],
+                           [0.20, 0.22, 0.29, 0.29],
+                           [0.10, 0.25, 0.33, 0.32]])
+# Monthly charges: base price per internet service, plus a price per add-on
+INTERNET_PRICES = np.array([45.0, 70.0, 20.0])
+ADDON_PRICE = 5.0
+# Log-odds of churn: intercept plus effects of the strongest drivers, tuned
+# so that about 26.5% of customers churn, as in the original dataset
+CHURN_INTERCEPT = -1.85
+CONTRACT_EFFECTS = np.array([0.17, -0.94, -1.97])
+INTERNET_EFFECTS = np.array([0.0, 0.6, -0.7])
+PAYMENT_EFFECTS = np.array([0.5, 0.0, -0.1, -0.1])
+
+
+# Columns are built as categoricals from integer codes, which skips creating
+# a string per row; CSV and Parquet output look the same
+def _category(codes, categories):
+    return pd.Categorical.from_codes(codes.astype('int8'), categories=categories)
+
+
+def _yes_no(mask):
+    return _category(mask, ['No', 'Yes'])
+
+
+# Pick one of values per row, with per-row probabilities (rows x values)
+def _choose(rng, values, probabilities):
+    cumulative = np.cumsum(probabilities, axis=-1)
+    picks = (rng.random((len(cumulative), 1)) > cumulative).sum(axis=1)
+    return values[np.minimum(picks, len(values) - 1)]
+
+
+# One chunk of synthetic customers in the layout of the source CSV. The
+# random stream is derived from (seed, chunk) alone, so any chunk can be
+# generated on its own, in any process, and always comes out the same.
+def generate_chunk(rows, seed=42, chunk=0, first_id=0):
+    rng = np.random.default_rng([seed, chunk])
+    contract = rng.choice(3, rows, p=CONTRACT_SHARES)
+    shapes = TENURE_SHAPES[contract]
+    tenure = np.maximum(np.rint(72 * rng.beta(shapes[:, 0], shapes[:, 1])), 1).astype('int64')
+    # A few customers joined this month
+    tenure[rng.random(rows) < 0.0016] = 0
+
+    senior = rng.random(rows) < 0.16
+    partner = rng.random(rows) < 0.48
+    dependents = rng.random(rows) < np.where(partner, 0.5, 0.1)
+
+    phone = rng.random(rows) < 0.9
+    multiple = phone & (rng.random(rows) < 0.42 + 0.05 * contract)
+    internet = rng.choice(3, rows, p=INTERNET_SHARES)
+    has_internet = internet != 2
+    addons = has_internet[:, None] & (rng.random((rows, len(ADDON_SERVICES))) < ADDON_RATES[contract][:, None])
+
+    paperless = rng.random(rows) < 0.59
+    payment = _choose(rng, np.arange(4), PAYMENT_SHARES[contract])
+
+    monthly = INTERNET_PRICES[internet] + ADDON_PRICE * (addons.sum(axis=1) + phone + multiple) \
+        + rng.normal(0, 3, rows)
+    monthly = np.clip(monthly, 18.25, 118.75).round(2)
+    total = (monthly * tenure * rng.uniform(0.9, 1.1, rows)).round(2)
+
+    logit = (CHURN_INTERCEPT + CONTRACT_EFFECTS[contract] + INTERNET_EFFECTS[internet]
+             + PAYMENT_EFFECTS[payment] + 0.3 * senior + 0.3 * paperless
+             - 0.03 * (tenure - 30) + 0.01 * (monthly - 65)
+             + 0.35 * (has_internet & ~addons[:, 0]) + 0.35 * (has_internet & ~addons[:, 3]))
+    churn = rng.random(rows) < 1 / (1 + np.exp(-logit))
+
+    ids = pc.utf8_lpad(pa.array(np.arange(first_id, first_id + rows)).cast(pa.string()), 10, '0')
+    df = pd.DataFrame({
+        'customerID': pc.binary_join_element_wise('C', ids, '').to_pandas(),
+        'gender': _category(rng.random(rows) < 0.5, ['Female', 'Male']),
+        'SeniorCitizen': senior.astype('int64'),
+        'Partner': _yes_no(partner),
+        'Dependents': _yes_no(dependents),
+        'tenure': tenure,
+        'PhoneService': _yes_no(phone),
+        'MultipleLines': _category(np.where(phone, multiple, 2), ['No', 'Yes', 'No phone service']),
+        'InternetService': _category(internet, INTERNET),
+    })
+    for i, service in enumerate(ADDON_SERVICES):
+        df[service] = _category(np.where(has_internet, addons[:, i], 2), ['No', 'Yes', 'No internet service'])
+    df['Contract'] = _category(contract, CONTRACTS)
+    df['PaperlessBilling'] = _yes_no(paperless)
+    df['PaymentMethod'] = _category(payment, PAYMENT_METHODS)
+    df['MonthlyCharges'] = monthly
+    # New customers have no total yet, blank like in the original extract
+    df['TotalCharges'] = np.where(tenure > 0, total, np.nan)
+    df['Churn'] = _yes_no(churn)
+    return df
+
+
+# A whole synthetic dataset of `rows` customers in memory
+def generate_churn_data(rows, seed=42):
+    return generate_chunk(rows, seed)
+
+
+def _generate(args):
+    return generate_chunk(*args)
+
+
+# Chunks of chunk_size rows covering `rows` customers, in order. The output
+# depends on seed and chunk_size only, not on the number of workers; with
+# several workers at most 2 chunks per worker are in flight.
+def iter_synthetic_chunks(rows, chunk_size=CHUNK_SIZE, seed=42, workers=1):
+    jobs = ((min(chunk_size, rows - start), seed, chunk, start)
+            for chunk, start in enumerate(range(0, rows, chunk_size)))
+    if workers <= 1:
+        for job in jobs:
+            yield _generate(job)
+        return
+    with get_context('spawn').Pool(workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.apply_async(_generate, (job,)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic telecom churn dataset of any size.")
+    parser.add_argument("output", help="CSV or Parquet file to write")
+    parser.add_argument("--rows", type=int, default=7043, help="number of customers")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    writer = ChunkWriter(args.output, float_format='%.2f')
+    try:
+        for chunk in iter_synthetic_chunks(args.rows, args.chunk_size, args.seed, args.workers):
+            writer.write(chunk)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    own, workers = peak_memory()
+    print(f"Wrote {args.rows:,} customers in {elapsed:.1f} s ({args.rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    print(f"Peak memory: {own:.0f} MB main process, {workers:.0f} MB largest worker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import pytest
+
+from data_loader import clean_churn_data, compact_churn_data
+from synthetic_data import generate_churn_data
+
+
+# Cleaned and compacted synthetic customers, shaped like load_churn_data()
+def _customers(rows, seed=42):
+    return compact_churn_data(clean_churn_data(generate_churn_data(rows, seed)))
+
+
+@pytest.fixture
+def make_customers():
+    return _customers
+
+
+@pytest.fixture(scope='session')
+def churn_df():
+    return _customers(5000, seed=7)
+
+
+# Write customers back in the raw extract's layout (0/1 SeniorCitizen, no
+# derived columns) to path, as CSV or Parquet by extension
+def _write_source(df, path):
+    raw = df.drop(columns=['churn_flag', 'tenure_group', 'charges_group'])
+    raw = raw.assign(SeniorCitizen=(raw['SeniorCitizen'] == 'Yes').astype(int))
+    if str(path).endswith('.parquet'):
+        raw.to_parquet(path, index=False)
+    else:
+        raw.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def write_source():
+    return _write_source
@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from aggregation import churn_rates, sum_by_group
+
+
+# The groupby().apply(lambda) the kernel replaced
+def reference_rates(df, keys):
+    return df.groupby(keys, observed=True)['Churn'].apply(lambda x: (x == 'Yes').mean() * 100).reset_index()
+
+
+@pytest.mark.parametrize('keys', [['Contract'], ['tenure_group'], ['charges_group', 'Contract'],
+                                  ['gender', 'SeniorCitizen', 'Partner']])
+def test_churn_rates_match_groupby(churn_df, keys):
+    expected = reference_rates(churn_df, keys).rename(columns={'Churn': 'Churn Rate (%)'})
+    pd.testing.assert_frame_equal(churn_rates(churn_df, keys), expected, check_dtype=False,
+                                  check_categorical=False)
+
+
+def test_sum_by_group_matches_groupby_on_plain_columns(churn_df):
+    df = churn_df.astype({'Contract': object, 'PaymentMethod': object})
+    result = sum_by_group(df, ['Contract', 'PaymentMethod'],
+                          {'Customers': None, 'Charges': df['MonthlyCharges'].to_numpy(dtype='float64')})
+    expected = df.groupby(['Contract', 'PaymentMethod']).agg(
+        Customers=('MonthlyCharges', 'size'), Charges=('MonthlyCharges', 'sum')).reset_index()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_sum_by_group_keeps_missing_keys_when_asked():
+    df = pd.DataFrame({'key': pd.Categorical(['a', None, 'b', None, 'a'])})
+    assert sum_by_group(df, ['key'], {'n': None})['n'].tolist() == [2, 1]
+    assert sum_by_group(df, ['key'], {'n': None}, dropna=False)['n'].tolist() == [2, 1, 2]
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from bitmap_index import BitmapIndex
+
+
+# Boolean mask of the rows matching filters, the way the pages used to filter
+def _mask(df, filters):
+    mask = np.ones(len(df), dtype=bool)
+    for col, allowed in filters.items():
+        mask &= df[col].isin(allowed).to_numpy()
+    return mask
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'Contract': ['Month-to-month']},
+    {'Contract': ['One year', 'Two year'], 'PaymentMethod': ['Electronic check', 'Mailed check']},
+    {'Contract': ['Month-to-month', 'One year', 'Two year']},
+    {'gender': ['Female'], 'SeniorCitizen': ['Yes'], 'InternetService': ['Fiber optic']},
+    {'Contract': []},
+    {'Contract': ['No such contract']},
+])
+def test_select_matches_boolean_mask(churn_df, filters):
+    # An odd row count leaves a partial last word
+    df = churn_df.iloc[:4999]
+    index = BitmapIndex(df)
+    mask = _mask(df, filters)
+    bits = index.select(filters)
+    np.testing.assert_array_equal(index.rows(filters), np.flatnonzero(mask))
+    assert index.count(bits) == mask.sum()
+    assert index.filter(df, filters).equals(df[mask])
+    counts = index.value_counts('PaymentMethod', filters)
+    expected = df.loc[mask, 'PaymentMethod'].value_counts()
+    assert counts.to_dict() == {value: expected.get(value, 0) for value in counts.index}
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from caching import LRUCache, deep_size, filter_key
+
+
+def test_evicts_least_recently_used_within_budget():
+    cache = LRUCache(max_bytes=300)
+    for key in 'abc':
+        cache.put(key, key, nbytes=100)
+    assert cache.get('a') == 'a'  # b is now the least recently used
+    cache.put('d', 'd', nbytes=100)
+    assert [key for key, _ in cache.entries()] == ['c', 'a', 'd']
+    assert cache.nbytes == 300 and cache.evictions == 1
+    cache.put('e', 'e', nbytes=250)
+    assert [key for key, _ in cache.entries()] == ['e']
+    assert cache.nbytes == 250 and cache.evictions == 4
+
+
+def test_values_larger_than_the_budget_are_not_kept():
+    cache = LRUCache(max_bytes=100)
+    cache.put('small', 1, nbytes=50)
+    assert cache.put('huge', 2, nbytes=101) == 2
+    assert cache.get('huge') is None
+    assert [key for key, _ in cache.entries()] == ['small']
+
+
+def test_replacing_a_key_updates_its_size():
+    cache = LRUCache(max_bytes=1000)
+    cache.put('a', 1, nbytes=400)
+    cache.put('a', 2, nbytes=100)
+    assert cache.get('a') == 2 and cache.nbytes == 100 and len(cache) == 1
+
+
+def test_get_or_compute_counts_hits_and_misses():
+    cache = LRUCache(max_bytes=2 ** 20)
+    calls = []
+    compute = lambda: calls.append(1) or pd.DataFrame({'x': np.arange(1000)})
+    first = cache.get_or_compute('k', compute)
+    assert cache.get_or_compute('k', compute) is first
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert cache.nbytes == deep_size(first) >= 8000
+
+
+def test_deep_size_counts_shared_objects_once():
+    frame = pd.DataFrame({'x': np.arange(10000)})
+    assert deep_size({'a': frame, 'b': frame}) < deep_size({'a': frame, 'b': frame.copy()})
+
+
+def test_filter_key_ignores_selection_order():
+    assert filter_key({'Contract': ['Two year', 'One year'], 'PaymentMethod': ['Mailed check']}) == \
+        filter_key({'PaymentMethod': ['Mailed check'], 'Contract': ['One year', 'Two year']})
+    assert filter_key({'Contract': ['One year']}) != filter_key({'Contract': ['Two year']})
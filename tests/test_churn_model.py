@@ -0,0 +1,110 @@
+import os
+import time
+
+import numpy as np
+
+from churn_model import KEEP_ARTIFACTS, ChurnModel, ModelStore, fit_frame, frame_chunks, roc_auc
+
+# Few steps, the tests check behavior rather than the fit quality
+FAST = {'min_steps': 200, 'max_epochs': 3}
+
+
+def test_fit_separates_churners(churn_df):
+    model = fit_frame(churn_df, FAST)
+    assert model.metrics['holdout_auc'] > 0.7
+    prob = model.predict_proba(churn_df)
+    assert ((prob > 0) & (prob < 1)).all()
+    churned = (churn_df['Churn'] == 'Yes').to_numpy()
+    assert prob[churned].mean() > prob[~churned].mean()
+
+
+def test_chunk_size_does_not_change_the_encoding(churn_df):
+    whole, chunked = ChurnModel(FAST), ChurnModel(FAST)
+    assert whole.fit_encoding(frame_chunks(churn_df)) == chunked.fit_encoding(frame_chunks(churn_df, 700))
+    assert whole.categories == chunked.categories
+    for col in whole.mean:
+        assert np.isclose(whole.mean[col], chunked.mean[col]) and np.isclose(whole.std[col], chunked.std[col])
+
+
+def test_saved_model_predicts_the_same(tmp_path, churn_df):
+    model = fit_frame(churn_df, FAST)
+    loaded = ChurnModel.load(model.save(str(tmp_path / 'model.json')))
+    np.testing.assert_allclose(loaded.predict_proba(churn_df), model.predict_proba(churn_df))
+    assert loaded.metrics == model.metrics
+
+
+def test_plain_strings_and_missing_columns_are_scored(churn_df):
+    model = fit_frame(churn_df, FAST)
+    df = churn_df.head(200)
+    plain = df.astype({col: object for col in df.select_dtypes('category').columns})
+    np.testing.assert_allclose(model.predict_proba(plain), model.predict_proba(df), rtol=1e-6)
+    assert np.isfinite(model.predict_proba(df.drop(columns=['Contract', 'tenure']))).all()
+
+
+def test_roc_auc():
+    assert roc_auc([0, 0, 1, 1], [0.1, 0.2, 0.8, 0.9]) == 1.0
+    assert roc_auc([0, 1, 0, 1], [0.5, 0.5, 0.5, 0.5]) == 0.5
+    assert np.isnan(roc_auc([1, 1], [0.2, 0.3]))
+
+
+# Wait for the background fit of a ModelStore to finish
+def _wait(store, timeout=60):
+    deadline = time.monotonic() + timeout
+    while store.training is not None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert store.training is None
+
+
+# A chunk source that fails the test when a fit reads it
+def _unused():
+    raise AssertionError("the model should not have been fitted")
+
+
+def test_store_fits_once_and_reloads_artifacts(tmp_path, churn_df):
+    store = ModelStore(FAST, cache_dir=str(tmp_path))
+    model = store.get('v1', frame_chunks(churn_df))
+    assert model.dataset == 'v1' and store.get('v1', _unused) is model
+    restarted = ModelStore(FAST, cache_dir=str(tmp_path))
+    np.testing.assert_allclose(restarted.get('v1', _unused).weights, model.weights)
+    # Another configuration has artifacts of its own
+    assert ModelStore(dict(FAST, l2=1e-3), cache_dir=str(tmp_path)).get('v1', frame_chunks(churn_df)) is not None
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_changed_data_is_refitted_in_the_background(tmp_path, churn_df, make_customers):
+    store = ModelStore(FAST, cache_dir=str(tmp_path))
+    first = store.get(('file', 0), frame_chunks(churn_df), source='file')
+    # Same source plus deltas: served the old model, warm-started in the background
+    assert store.get(('file', 1), frame_chunks(churn_df), source='file') is first
+    _wait(store)
+    warm = store.get(('file', 1), _unused, source='file')
+    assert warm is not first and warm.metrics.get('warm_start')
+    # A replaced source file is fitted from scratch
+    store.get(('other', 0), frame_chunks(make_customers(2000, seed=5)), source='other')
+    _wait(store)
+    fresh = store.get(('other', 0), _unused, source='other')
+    assert fresh.dataset == str(('other', 0)) and not fresh.metrics.get('warm_start')
+
+
+def test_failed_fits_keep_serving_and_back_off(tmp_path, churn_df):
+    store = ModelStore(FAST, cache_dir=str(tmp_path))
+    first = store.get('v1', frame_chunks(churn_df))
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise OSError("source went away")
+    assert store.get('v2', failing) is first
+    _wait(store)
+    assert isinstance(store.error, OSError) and len(calls) == 1
+    # The same version is not retried on every rerun
+    assert store.get('v2', failing) is first
+    assert store.training is None and len(calls) == 1
+
+
+def test_store_keeps_a_bounded_number_of_artifacts(tmp_path, churn_df):
+    store = ModelStore(FAST, cache_dir=str(tmp_path))
+    for version in range(KEEP_ARTIFACTS + 2):
+        store.get(f'v{version}', frame_chunks(churn_df))
+        _wait(store)
+    assert len(os.listdir(tmp_path)) == KEEP_ARTIFACTS
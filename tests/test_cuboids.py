@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+import aggregation
+from aggregation import ChurnAggregates, aggregate_frame
+
+
+@pytest.mark.parametrize('keys, filters', [
+    (['Contract'], None),
+    (['PaymentMethod'], {'Contract': ['Month-to-month', 'One year']}),
+    (['StreamingTV', 'TechSupport'], None),
+    (['Partner'], {'gender': ['Female'], 'SeniorCitizen': ['Yes']}),
+    (['Contract', 'charges_group'], None),
+])
+def test_tables_match_groupby(churn_df, keys, filters):
+    df = churn_df
+    for col, allowed in (filters or {}).items():
+        df = df[df[col].isin(allowed)]
+    expected = df.groupby(keys, observed=True).agg(
+        Customers=('churn_flag', 'size'), Churned=('churn_flag', 'sum')).reset_index()
+    result = aggregate_frame(churn_df).table(keys, filters)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_categorical=False)
+
+
+def test_cuboids_stay_small(make_customers):
+    small, large = aggregate_frame(make_customers(2000, seed=1)), aggregate_frame(make_customers(20000, seed=2))
+    # Every observed value of each column, plus missing ones (tenure 0 has no group)
+    bound = {dims: 1 for dims in large.cuboids}
+    for dims in bound:
+        for col in dims:
+            bound[dims] *= len(large.levels(col)) + 1
+    assert all(len(large.cuboids[dims]) <= bound[dims] for dims in bound)
+    assert sum(len(cells) for cells in large.cuboids.values()) < 2 * sum(len(c) for c in small.cuboids.values())
+
+
+def test_columns_outside_every_cuboid_are_refused(churn_df):
+    with pytest.raises(KeyError):
+        aggregate_frame(churn_df).table(['Contract', 'gender'])
+
+
+def test_pending_chunk_counts_stay_bounded(churn_df, monkeypatch):
+    monkeypatch.setattr(aggregation, 'PENDING_CELLS', 500)
+    aggregates = ChurnAggregates()
+    for start in range(0, len(churn_df), 250):
+        aggregates.update(churn_df.iloc[start:start + 250])
+        assert aggregates._pending_cells < 500 + 3 * 250
+    whole = aggregate_frame(churn_df)
+    for keys in [['Contract', 'tenure_group'], ['OnlineBackup', 'TechSupport'], ['gender']]:
+        pd.testing.assert_frame_equal(aggregates.table(keys), whole.table(keys))
+
+
+def test_merge_and_subtract_match_recompute(churn_df):
+    first, second = churn_df.iloc[:3000], churn_df.iloc[3000:]
+    merged = aggregate_frame(first).merge(aggregate_frame(second))
+    whole = aggregate_frame(churn_df)
+    for keys in [['PaymentMethod', 'PaperlessBilling'], ['MultipleLines', 'StreamingMovies']]:
+        pd.testing.assert_frame_equal(merged.table(keys), whole.table(keys))
+    merged.subtract(second)
+    pd.testing.assert_frame_equal(merged.table(['Contract']), aggregate_frame(first).table(['Contract']))
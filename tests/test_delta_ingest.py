@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from aggregation import aggregate_frame
+from delta_ingest import IncrementalDataset
+
+KEYS = [['Contract'], ['PaymentMethod', 'tenure_group'], ['OnlineSecurity', 'StreamingTV'],
+        ['gender', 'Dependents']]
+
+
+# Base customers plus two deltas that change some of them and add new ones,
+# with the rows a full reload after both deltas would hold
+def _scenario(make_customers):
+    base = make_customers(6000, seed=1).iloc[:4000].reset_index(drop=True)
+    first = make_customers(6000, seed=2).iloc[3000:5000].reset_index(drop=True)
+    second = make_customers(6000, seed=3).iloc[4500:6000].reset_index(drop=True)
+    expected = pd.concat([base.iloc[:3000], first.iloc[:1500], second], ignore_index=True)
+    return base, [first, second], expected
+
+
+def _assert_same_rows(frame, expected):
+    left = frame.set_index('customerID').sort_index().astype(str)
+    right = expected.set_index('customerID').sort_index()[left.columns].astype(str)
+    pd.testing.assert_frame_equal(left, right)
+
+
+def test_apply_matches_full_recompute(make_customers):
+    base, deltas, expected = _scenario(make_customers)
+    dataset = IncrementalDataset(base, aggregate_frame(base))
+    dataset.apply(*deltas)
+    recomputed = aggregate_frame(expected)
+
+    assert (dataset.aggregates.rows, dataset.aggregates.churned) == (recomputed.rows, recomputed.churned)
+    for keys in KEYS:
+        pd.testing.assert_frame_equal(dataset.aggregates.table(keys), recomputed.table(keys),
+                                      check_dtype=False, check_categorical=False)
+    np.testing.assert_allclose(dataset.aggregates.stats.means, recomputed.stats.means)
+    np.testing.assert_allclose(dataset.aggregates.stats.comoments, recomputed.stats.comoments, rtol=1e-9)
+    _assert_same_rows(dataset.frame, expected)
+    assert not (dataset.frame.dtypes == object).any()
+
+
+def test_apply_leaves_previous_aggregates_untouched(make_customers):
+    base, deltas, _ = _scenario(make_customers)
+    dataset = IncrementalDataset(base, aggregate_frame(base))
+    before = dataset.aggregates
+    table = before.table(['Contract'])
+    dataset.apply(deltas[0])
+    assert dataset.aggregates is not before
+    pd.testing.assert_frame_equal(before.table(['Contract']), table)
+
+
+def test_refresh_reapplies_rewritten_files(tmp_path, make_customers, write_source):
+    base, deltas, expected = _scenario(make_customers)
+    dataset = IncrementalDataset(base, aggregate_frame(base))
+    for delta in deltas:
+        write_source(delta, tmp_path / 'delta.csv')
+        assert dataset.refresh(str(tmp_path)) == ['delta.csv']
+        assert dataset.refresh(str(tmp_path)) == []
+    assert dataset.applied == ['delta.csv', 'delta.csv']
+    assert dataset.aggregates.rows == len(expected)
+    _assert_same_rows(dataset.frame, expected)
+
+
+def test_rows_are_concatenated_only_when_asked(make_customers):
+    base, deltas, expected = _scenario(make_customers)
+    dataset = IncrementalDataset(base, aggregate_frame(base))
+    dataset.apply(*deltas)
+    assert dataset._frame is None
+    assert sum(len(frame) for frame in dataset.frames()) == len(base) + sum(len(delta) for delta in deltas)
+    assert len(dataset.view()) == len(expected)
+    assert dataset.view() is not dataset.view()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsampling import downsample_points
+
+
+def _points(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    churn = np.where(rng.random(rows) < 0.05, 'Yes', 'No')
+    # A dense cluster plus a sparse tail
+    tenure = np.concatenate([rng.normal(10, 1, rows - 200), rng.uniform(0, 72, 200)])
+    charges = np.concatenate([rng.normal(70, 2, rows - 200), rng.uniform(18, 120, 200)])
+    return pd.DataFrame({'tenure': tenure, 'MonthlyCharges': charges, 'Churn': churn})
+
+
+@pytest.mark.parametrize('max_points', [500, 2000, 5000])
+def test_sample_stays_within_the_cap(max_points):
+    df = _points(50000)
+    sample = downsample_points(df, 'tenure', 'MonthlyCharges', max_points=max_points)
+    assert len(sample) <= max_points
+    assert sample.index.is_unique and sample.index.isin(df.index).all()
+
+
+def test_small_frames_are_returned_unchanged():
+    df = _points(1000)
+    assert downsample_points(df, 'tenure', 'MonthlyCharges', max_points=1000) is df
+
+
+def test_every_churn_class_keeps_its_sparse_points():
+    df = _points(50000)
+    sample = downsample_points(df, 'tenure', 'MonthlyCharges', max_points=2000)
+    assert set(sample['Churn']) == {'Yes', 'No'}
+    # The sparse tail keeps far more points than a uniform sample would
+    uniform = 200 * len(sample) / len(df)
+    assert sample.index.isin(df.index[-200:]).sum() > 5 * uniform
+
+
+def test_sample_is_deterministic_and_skips_missing_values():
+    df = _points(20000)
+    df.loc[df.index[:100], 'tenure'] = np.nan
+    first = downsample_points(df, 'tenure', 'MonthlyCharges', max_points=1000)
+    assert first.index.equals(downsample_points(df, 'tenure', 'MonthlyCharges', max_points=1000).index)
+    assert first['tenure'].notna().all()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregation import aggregate_frame
+from importance import IMPORTANCE_CATEGORICAL, categorical_importance, numeric_importance
+
+
+# Mutual information (bits), chi-square, Cramér's V and churn rate spread of
+# one column, computed directly from its crosstab with churn
+def reference_importance(df, col):
+    table = pd.crosstab(df[col], df['Churn']).to_numpy(dtype='float64')
+    n = table.sum()
+    joint = table / n
+    independent = joint.sum(axis=1, keepdims=True) * joint.sum(axis=0, keepdims=True)
+    nonzero = joint > 0
+    mi = (joint[nonzero] * np.log2(joint[nonzero] / independent[nonzero])).sum()
+    expected = independent * n
+    chi2 = ((table - expected) ** 2 / expected).sum()
+    rates = df.groupby(col, observed=True)['churn_flag'].mean() * 100
+    return mi, chi2, np.sqrt(chi2 / n), rates.max() - rates.min()
+
+
+def test_categorical_importance_matches_crosstabs(churn_df):
+    result = categorical_importance(aggregate_frame(churn_df)).set_index('Feature')
+    assert sorted(result.index) == sorted(IMPORTANCE_CATEGORICAL)
+    assert result['Mutual Information'].is_monotonic_decreasing
+    for col in IMPORTANCE_CATEGORICAL:
+        expected = reference_importance(churn_df, col)
+        actual = result.loc[col, ['Mutual Information', 'Chi-square', "Cramér's V", 'Churn Rate Spread (pp)']]
+        np.testing.assert_allclose(actual.to_numpy(dtype='float64'), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_contract_outranks_gender(churn_df):
+    ranking = categorical_importance(aggregate_frame(churn_df))['Feature'].tolist()
+    assert ranking.index('Contract') < ranking.index('gender')
+
+
+def test_numeric_importance_is_the_point_biserial_correlation(churn_df):
+    result = numeric_importance(aggregate_frame(churn_df).stats).set_index('Feature')
+    values = churn_df[['tenure', 'MonthlyCharges', 'TotalCharges', 'churn_flag']].astype('float64').dropna()
+    for col in result.index:
+        assert result.loc[col, 'Correlation'] == pytest.approx(values[col].corr(values['churn_flag']))
+    assert result['|Correlation|'].is_monotonic_decreasing
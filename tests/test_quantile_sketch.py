@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from quantile_sketch import KLLSketch, QuantileSketches, rank_error
+
+QS = np.linspace(0.01, 0.99, 99)
+
+
+# Largest distance between the requested and the true rank of each answer
+def _max_rank_error(values, answers, qs):
+    ordered = np.sort(values)
+    ranks = np.searchsorted(ordered, answers, side='right') / len(ordered)
+    below = np.searchsorted(ordered, answers, side='left') / len(ordered)
+    # Within a run of equal values any rank between the two ends is exact
+    return float(np.max(np.maximum(below - qs, 0) + np.maximum(qs - ranks, 0)))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_rank_error_within_bound(seed):
+    rng = np.random.default_rng(seed)
+    values = np.concatenate([rng.lognormal(3, 1, 60000), rng.uniform(0, 100, 40000)])
+    sketch = KLLSketch(seed=seed)
+    for chunk in np.array_split(values, 37):
+        sketch.update(chunk)
+    assert sketch.count == len(values)
+    assert (sketch.minimum, sketch.maximum) == (values.min(), values.max())
+    assert sum(len(items) for items in sketch.levels) < 4 * sketch.k
+    assert _max_rank_error(values, sketch.quantiles(QS), QS) <= rank_error(sketch.k)
+
+
+def test_merged_sketches_within_bound():
+    rng = np.random.default_rng(11)
+    parts = [rng.normal(loc, 10, 20000) for loc in range(0, 100, 20)]
+    sketches = [KLLSketch(seed=i).update(part) for i, part in enumerate(parts)]
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged.merge(sketch)
+    values = np.concatenate(parts)
+    assert merged.count == len(values)
+    np.testing.assert_allclose(merged.total, values.sum())
+    assert _max_rank_error(values, merged.quantiles(QS), QS) <= rank_error(merged.k)
+
+
+def test_box_stats_follow_filters(churn_df):
+    sketches = QuantileSketches()
+    sketches.update(churn_df)
+    df = churn_df[churn_df['Contract'] == 'Month-to-month']
+    values = df['MonthlyCharges'].to_numpy(dtype='float64')
+    answers = sketches.quantiles('MonthlyCharges', QS, filters={'Contract': ['Month-to-month']})
+    assert _max_rank_error(values, answers, QS) <= rank_error()
+
+
+def test_subtracted_rows_stay_within_the_widened_bound(churn_df):
+    sketches = QuantileSketches()
+    sketches.update(churn_df)
+    removed = churn_df.iloc[:1500]
+    sketches.subtract(removed)
+    values = churn_df['tenure'].iloc[1500:].to_numpy(dtype='float64')
+    answers = sketches.quantiles('tenure', QS)
+    # Removed values add their count to the count the error applies to
+    bound = rank_error() * (len(churn_df) + len(removed)) / len(values)
+    assert _max_rank_error(values, answers, QS) <= bound
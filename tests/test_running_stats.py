@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from running_stats import RunningStats
+
+COLUMNS = ['tenure', 'MonthlyCharges', 'TotalCharges', 'churn_flag']
+
+
+def _values(df):
+    return df[COLUMNS].astype('float64').dropna()
+
+
+def _assert_matches(stats, df):
+    values = _values(df)
+    assert stats.count == len(values)
+    np.testing.assert_allclose(stats.means, values.mean().to_numpy(), rtol=1e-9)
+    expected = values.cov()
+    for a in COLUMNS:
+        for b in COLUMNS:
+            np.testing.assert_allclose(stats.covariance(a, b), expected.loc[a, b], rtol=1e-7, atol=1e-9)
+    np.testing.assert_allclose(stats.correlations().to_numpy(), values.corr().to_numpy(), rtol=1e-7, atol=1e-9)
+
+
+def test_merged_chunks_match_dataframe_cov(churn_df):
+    df = churn_df.copy()
+    df.loc[df.index[::97], 'TotalCharges'] = np.nan  # rows with a gap are skipped
+    parts = [RunningStats(COLUMNS).update(df.iloc[start:start + 800]) for start in range(0, len(df), 800)]
+    stats = parts[0]
+    for part in parts[1:]:
+        stats.merge(part)
+    _assert_matches(stats, df)
+    np.testing.assert_allclose(stats.minimum, _values(df).min().to_numpy())
+    np.testing.assert_allclose(stats.maximum, _values(df).max().to_numpy())
+
+
+def test_subtract_matches_dataframe_cov_of_the_rest(churn_df):
+    stats = RunningStats(COLUMNS).update(churn_df)
+    removed = churn_df.iloc[1000:2500]
+    stats.subtract(removed)
+    _assert_matches(stats, pd.concat([churn_df.iloc[:1000], churn_df.iloc[2500:]]))
+    stats.subtract(churn_df.drop(removed.index))
+    assert stats.count == 0
@@ -0,0 +1,65 @@
+import numpy as np
+
+from scoring import RISK_BINS, churn_probabilities, risk_categories
+
+
+# The risk calculator's original per-customer if-chain
+def reference_probability(row):
+    churn_prob = 26.54
+    if row['Contract'] == 'Month-to-month':
+        churn_prob *= 1.6
+    elif row['Contract'] == 'One year':
+        churn_prob *= 0.42
+    elif row['Contract'] == 'Two year':
+        churn_prob *= 0.11
+    if row['tenure'] < 12:
+        churn_prob *= 1.8
+    elif row['tenure'] > 40:
+        churn_prob *= 0.4
+    if row['InternetService'] == 'Fiber optic':
+        churn_prob *= 1.5
+    elif row['InternetService'] == 'No':
+        churn_prob *= 0.3
+    if row['OnlineSecurity'] == 'No' and row['InternetService'] != 'No internet service':
+        churn_prob *= 1.3
+    if row['TechSupport'] == 'No' and row['InternetService'] != 'No internet service':
+        churn_prob *= 1.3
+    if row['PaymentMethod'] == 'Electronic check':
+        churn_prob *= 1.4
+    elif row['PaymentMethod'] in ['Bank transfer (automatic)', 'Credit card (automatic)']:
+        churn_prob *= 0.7
+    if row['MonthlyCharges'] > 80:
+        churn_prob *= 1.3
+    elif row['MonthlyCharges'] < 40:
+        churn_prob *= 0.7
+    if row['SeniorCitizen'] == 'Yes':
+        churn_prob *= 1.2
+    if row['PaperlessBilling'] == 'Yes':
+        churn_prob *= 1.1
+    return max(1, min(99, churn_prob))
+
+
+def reference_category(prob):
+    if prob < 20:
+        return "Low Risk"
+    elif prob < 40:
+        return "Moderate Risk"
+    elif prob < 60:
+        return "High Risk"
+    return "Very High Risk"
+
+
+def test_churn_probabilities_match_if_chain(churn_df):
+    expected = np.array([reference_probability(row) for _, row in churn_df.iterrows()])
+    prob = churn_probabilities(churn_df)
+    np.testing.assert_allclose(prob, expected, rtol=1e-5)
+    # float32 may round a probability across a category edge, skip those
+    clear = np.min(np.abs(expected[:, None] - np.array(RISK_BINS)), axis=1) > 1e-3
+    categories = np.asarray(risk_categories(prob), dtype=object)
+    assert list(categories[clear]) == [reference_category(p) for p in expected[clear]]
+
+
+def test_churn_probabilities_on_plain_strings(churn_df):
+    df = churn_df.head(300)
+    plain = df.astype({col: object for col in df.select_dtypes('category').columns})
+    np.testing.assert_array_equal(churn_probabilities(plain), churn_probabilities(df))
@@ -0,0 +1,106 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import shared_dataset
+from aggregation import aggregate_frame
+from bitmap_index import BitmapIndex
+from data_loader import load_churn_data
+from shared_dataset import (SharedDataset, _private_dir, _shareable, attach_dataset, read_snapshot,
+                            snapshot_version, write_snapshot)
+
+as_root = pytest.mark.skipif(not hasattr(os, 'geteuid') or os.geteuid() != 0,
+                             reason='changing file owners needs root')
+
+
+def _dataset(df):
+    return SharedDataset(df, aggregate_frame(df), BitmapIndex(df), ['d1.csv'], 'v1')
+
+
+def test_snapshot_round_trip_maps_the_arrays(tmp_path, churn_df):
+    target = str(tmp_path / 'data.snapshot')
+    write_snapshot(_dataset(churn_df), target)
+    attached = read_snapshot(target)
+    pd.testing.assert_frame_equal(attached.frame, churn_df)
+    pd.testing.assert_frame_equal(attached.aggregates.table(['Contract']), aggregate_frame(churn_df).table(['Contract']))
+    assert (attached.applied, attached.version) == (['d1.csv'], 'v1')
+    # Columns are read-only views of the mapping, not copies
+    assert not attached.frame['MonthlyCharges'].to_numpy().flags.writeable
+    assert not attached.frame['Contract'].cat.codes.to_numpy().flags.writeable
+
+
+def test_string_columns_are_published_out_of_band(churn_df):
+    frame = _shareable(churn_df.astype({'customerID': object}))
+    buffers = []
+    stream = pickle.dumps(frame[['customerID']], protocol=5, buffer_callback=buffers.append)
+    assert len(stream) < 10_000 and sum(buffer.raw().nbytes for buffer in buffers) > len(frame) * 11
+
+
+def test_other_files_are_refused(tmp_path, churn_df):
+    target = tmp_path / 'data.snapshot'
+    (tmp_path / 'junk.snapshot').write_bytes(b'not a snapshot at all')
+    with pytest.raises(ValueError):
+        read_snapshot(str(tmp_path / 'junk.snapshot'))
+    write_snapshot(_dataset(churn_df.head(100)), str(target))
+    os.symlink(target, tmp_path / 'link.snapshot')
+    with pytest.raises(OSError):
+        read_snapshot(str(tmp_path / 'link.snapshot'))
+
+
+@as_root
+def test_snapshots_of_other_users_are_refused(tmp_path, churn_df):
+    target = str(tmp_path / 'data.snapshot')
+    write_snapshot(_dataset(churn_df.head(100)), target)
+    os.chown(target, 12345, 12345)
+    with pytest.raises(PermissionError):
+        read_snapshot(target)
+
+
+def test_private_dir_is_owned_and_closed(tmp_path):
+    private = _private_dir(str(tmp_path))
+    assert os.path.dirname(private) == str(tmp_path)
+    os.chmod(private, 0o777)
+    assert _private_dir(str(tmp_path)) == private
+    assert os.stat(private).st_mode & 0o777 == 0o700
+
+
+def test_planted_private_dirs_are_refused(tmp_path):
+    planted = tmp_path / f'churn-snapshots-{os.getuid()}'
+    os.symlink(tmp_path / 'elsewhere', planted)
+    os.mkdir(tmp_path / 'elsewhere')
+    with pytest.raises(PermissionError):
+        _private_dir(str(tmp_path))
+
+
+@as_root
+def test_private_dirs_of_other_users_are_refused(tmp_path):
+    os.mkdir(tmp_path / f'churn-snapshots-{os.getuid()}')
+    os.chown(tmp_path / f'churn-snapshots-{os.getuid()}', 12345, 12345)
+    with pytest.raises(PermissionError):
+        _private_dir(str(tmp_path))
+
+
+def test_attach_publishes_once_and_prunes_old_versions(tmp_path, churn_df, write_source, monkeypatch):
+    source = write_source(churn_df, tmp_path / 'customers.csv')
+    monkeypatch.setattr(shared_dataset, 'load_churn_data',
+                        lambda path: load_churn_data(path, cache_dir=str(tmp_path / 'cache')))
+    shared, deltas = str(tmp_path / 'shm'), str(tmp_path / 'deltas')
+    version = snapshot_version('source-1', deltas)
+    first = attach_dataset(version, source, deltas, shared)
+    assert len(first.frame) == len(churn_df) and first.applied == []
+
+    os.mkdir(deltas)
+    write_source(churn_df.head(50).assign(MonthlyCharges=np.float32(20)), os.path.join(deltas, 'd1.csv'))
+    newer = snapshot_version('source-1', deltas)
+    assert newer != version
+    second = attach_dataset(newer, source, deltas, shared)
+    assert second.applied == ['d1.csv'] and len(second.frame) == len(churn_df)
+    assert (second.frame['MonthlyCharges'] == 20).sum() >= 50
+    # Attaching again maps the published file instead of building it
+    monkeypatch.setattr(shared_dataset, 'build_shared_dataset', None)
+    assert attach_dataset(newer, source, deltas, shared).version == newer
+    assert [name for name in os.listdir(_private_dir(shared)) if name.endswith('.snapshot')] == \
+        [os.path.basename(shared_dataset._snapshot_path(newer, source, shared))]
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregation import aggregate_frame, stream_aggregates
+from data_loader import iter_source_chunks
+
+
+@pytest.mark.parametrize('name', ['customers.csv', 'customers.parquet'])
+def test_chunks_cover_the_source_in_order(tmp_path, churn_df, write_source, name):
+    path = write_source(churn_df, tmp_path / name)
+    chunks = list(iter_source_chunks(path, chunk_size=1200))
+    assert [len(chunk) for chunk in chunks] == [1200] * 4 + [200]
+    assert pd.concat([chunk['customerID'] for chunk in chunks]).tolist() == churn_df['customerID'].tolist()
+
+
+def test_streamed_aggregates_match_frame(tmp_path, make_customers, write_source):
+    df = make_customers(3000, seed=3)
+    path = write_source(df, tmp_path / 'customers.csv')
+    streamed = stream_aggregates(path, chunk_size=700, sample_size=500)
+    whole = aggregate_frame(df)
+    assert (streamed.rows, streamed.churned) == (whole.rows, whole.churned)
+    for keys in [['Contract', 'tenure_group'], ['InternetService', 'OnlineSecurity'], ['Dependents']]:
+        pd.testing.assert_frame_equal(streamed.table(keys), whole.table(keys), check_dtype=False,
+                                      check_categorical=False)
+    np.testing.assert_allclose(streamed.stats.means, whole.stats.means)
+
+
+def test_sample_is_bounded_and_repeatable(tmp_path, churn_df, write_source):
+    path = write_source(churn_df, tmp_path / 'customers.csv')
+    first = stream_aggregates(path, chunk_size=700, sample_size=400).sample
+    again = stream_aggregates(path, chunk_size=700, sample_size=400).sample
+    assert len(first) == 400 and first['customerID'].is_unique
+    assert first['customerID'].isin(churn_df['customerID']).all()
+    assert first['customerID'].tolist() == again['customerID'].tolist()
+    assert isinstance(first['Contract'].dtype, pd.CategoricalDtype)
+
+
+def test_streaming_an_empty_source_is_a_clear_error(tmp_path, churn_df):
+    path = tmp_path / 'empty.parquet'
+    churn_df.head(0).to_parquet(path)
+    with pytest.raises(ValueError, match='no customers'):
+        stream_aggregates(str(path))
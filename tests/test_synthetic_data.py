@@ -0,0 +1,41 @@
+import pandas as pd
+
+from data_loader import CATEGORICAL_COLUMNS, ChunkWriter, clean_churn_data, read_source
+from synthetic_data import generate_churn_data, iter_synthetic_chunks
+
+
+def _generate(rows, chunk_size, workers, seed=42):
+    return pd.concat(iter_synthetic_chunks(rows, chunk_size, seed, workers), ignore_index=True)
+
+
+def test_output_does_not_depend_on_the_worker_count():
+    single = _generate(5000, 1200, workers=1)
+    pd.testing.assert_frame_equal(_generate(5000, 1200, workers=2), single)
+    assert len(single) == 5000
+    assert single['customerID'].tolist() == [f'C{i:010d}' for i in range(5000)]
+
+
+def test_seeds_are_repeatable_and_distinct():
+    pd.testing.assert_frame_equal(generate_churn_data(2000, seed=1), generate_churn_data(2000, seed=1))
+    assert not generate_churn_data(2000, seed=1).equals(generate_churn_data(2000, seed=2))
+
+
+def test_data_has_the_extract_schema_and_churn_drivers():
+    df = clean_churn_data(generate_churn_data(20000, seed=3))
+    assert set(CATEGORICAL_COLUMNS) <= set(df.columns)
+    assert df['TotalCharges'].notna().all()
+    rates = (df['Churn'] == 'Yes').groupby(df['Contract'], observed=True).mean()
+    assert rates['Month-to-month'] > rates['One year'] > rates['Two year']
+    assert 0.15 < (df['Churn'] == 'Yes').mean() < 0.4
+
+
+def test_written_chunks_read_back(tmp_path):
+    chunks = list(iter_synthetic_chunks(3000, 1000, seed=4))
+    for name in ['customers.csv', 'customers.parquet']:
+        writer = ChunkWriter(str(tmp_path / name), float_format='%.2f')
+        for chunk in chunks:
+            writer.write(chunk)
+        writer.close()
+        back = read_source(str(tmp_path / name))
+        assert len(back) == 3000
+        assert back['customerID'].tolist() == pd.concat(chunks)['customerID'].tolist()